@@ -0,0 +1,154 @@
+"""
+Headless CLI - SuperClearChat batch mode (HTTP-only, không kết nối gateway)
+
+Usage:
+    python cli.py --days 7 --user 123 --guild 456
+    python cli.py --days 3 --users-file targets.txt --channel 789 --summary result.json
+
+Users file: mỗi dòng một user ID, có thể kèm scope riêng `guild:<id>` hoặc `channel:<id>`.
+Dòng trống và dòng bắt đầu bằng `#` được bỏ qua.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import discord
+from utils.logger import logger
+from utils.config import config
+from utils.helpers import parse_user_mention, validate_days
+from core.http_client import create_http_client, run_http_clear
+from core.worker_pool import worker_pool
+
+def parse_scope(spec: str) -> tuple:
+    """
+    Parse a scope spec like `guild:123` or `channel:456`
+
+    Returns:
+        Tuple of (kind, id)
+    """
+    kind, _, raw_id = spec.partition(':')
+    kind = kind.lower()
+    if kind not in ('guild', 'channel') or not raw_id.isdigit():
+        raise ValueError(f"Scope không hợp lệ: '{spec}' (dùng guild:<id> hoặc channel:<id>)")
+    return kind, int(raw_id)
+
+def build_jobs(args) -> list:
+    """
+    Build the list of (user_id, kind, scope_id) jobs from arguments and users file
+    """
+    default_scopes = [('guild', gid) for gid in args.guild] + [('channel', cid) for cid in args.channel]
+    jobs = []
+
+    def add_user(raw_user: str, scopes: list, origin: str):
+        user_id = parse_user_mention(raw_user)
+        if not user_id:
+            raise ValueError(f"User ID không hợp lệ: '{raw_user}' ({origin})")
+        if not scopes:
+            raise ValueError(f"Không có scope cho user {user_id} ({origin}) - dùng --guild/--channel")
+        for kind, scope_id in scopes:
+            jobs.append((user_id, kind, scope_id))
+
+    for raw_user in args.user:
+        add_user(raw_user, default_scopes, "--user")
+
+    if args.users_file:
+        with open(args.users_file, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split()
+                scopes = [parse_scope(spec) for spec in parts[1:]] or default_scopes
+                add_user(parts[0], scopes, f"{args.users_file}:{line_no}")
+
+    return jobs
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SuperClearChat batch mode (HTTP-only)")
+    parser.add_argument('--days', required=True, help=f"Số ngày ({config.MIN_DAYS_LIMIT}-{config.MAX_DAYS_LIMIT})")
+    parser.add_argument('--user', action='append', default=[], help="User ID hoặc mention (lặp lại được)")
+    parser.add_argument('--users-file', help="File chứa user ID (và scope tùy chọn) mỗi dòng")
+    parser.add_argument('--guild', action='append', type=int, default=[], help="Xóa trong tất cả kênh của server")
+    parser.add_argument('--channel', action='append', type=int, default=[], help="Xóa trong một kênh")
+    parser.add_argument('--summary', help="Ghi JSON summary ra file thay vì stdout")
+    return parser.parse_args(argv)
+
+async def run(args) -> dict:
+    """Run all jobs and return the summary"""
+    days = validate_days(args.days, config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT)
+    if not days:
+        raise ValueError(f"Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}")
+
+    jobs = build_jobs(args)
+    if not jobs:
+        raise ValueError("Không có job nào - dùng --user hoặc --users-file")
+
+    started = time.perf_counter()
+    client = await create_http_client(config.DISCORD_TOKEN)
+    logger.info(f"Đăng nhập HTTP-only: {client.user} ({time.perf_counter() - started:.2f}s)")
+
+    results = []
+    try:
+        if config.HELPER_TOKENS:
+            await worker_pool.start(config.HELPER_TOKENS)
+        for index, (user_id, kind, scope_id) in enumerate(jobs, 1):
+            logger.info(f"[{index}/{len(jobs)}] User {user_id} - {kind}:{scope_id}")
+            job_started = time.perf_counter()
+            if kind == 'guild':
+                summary = await run_http_clear(client, user_id, days, guild_id=scope_id)
+            else:
+                summary = await run_http_clear(client, user_id, days, channel_id=scope_id)
+            summary.update({
+                'user_id': str(user_id),
+                'scope': kind,
+                'scope_id': str(scope_id),
+                'seconds': round(time.perf_counter() - job_started, 3)
+            })
+            results.append(summary)
+            status = "✓" if summary['success'] else "✗"
+            logger.info(f"[{index}/{len(jobs)}] {status} Đã xóa {summary['deleted']} tin nhắn, {summary['errors']} lỗi")
+    finally:
+        await worker_pool.close()
+        await client.close()
+
+    return {
+        'success': all(r['success'] for r in results),
+        'days': days,
+        'total_deleted': sum(r['deleted'] for r in results),
+        'total_errors': sum(r['errors'] for r in results),
+        'seconds': round(time.perf_counter() - started, 3),
+        'jobs': results
+    }
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        summary = asyncio.run(run(args))
+    except discord.LoginFailure:
+        logger.error("❌ Token Discord không hợp lệ!")
+        return 2
+    except (ValueError, OSError) as e:
+        logger.error(f"❌ {e}")
+        return 2
+
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(output)
+        logger.info(f"Đã ghi summary: {args.summary}")
+    else:
+        print(output)
+    return 0 if summary['success'] else 1
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        logger.info("Đã dừng bởi người dùng")
+        sys.exit(130)
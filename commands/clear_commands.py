@@ -2,13 +2,50 @@
 Discord bot commands - Both prefix and slash commands
 Modified to support clearing messages of users who left the server
 """
+import time
 import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.logger import logger
 from utils.config import config
-from utils.helpers import parse_user_mention, validate_days, get_user_from_guild, format_user_display
-from core.message_cleaner import clear_user_messages, clear_user_messages_all_channels
+from utils.helpers import parse_user_mention, parse_message_link, validate_days, get_user_from_guild, format_user_display
+from core.message_cleaner import (
+    clear_user_messages, clear_user_messages_all_channels,
+    clear_similar_messages, clear_similar_messages_all_channels
+)
+from core.slow_lane import slow_lane
+from core.user_index import user_index
+from core.clear_jobs import clear_jobs
+from core.warm_start import warm_start
+from core.channel_reset import reset_channel
+from core.softban import softban_allowed, clear_user_messages_softban
+from core.job_queue import job_queue, expand_summary
+from core.similarity import SimilarityMatcher
+
+class ResetConfirmView(discord.ui.View):
+    """Confirm / cancel buttons for a channel reset (only the requester can press them)"""
+    
+    def __init__(self, requester_id: int):
+        super().__init__(timeout=30)
+        self.requester_id = requester_id
+        self.confirmed = False
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.requester_id:
+            await interaction.response.send_message("❌ Chỉ người gọi lệnh mới xác nhận được.", ephemeral=True)
+            return False
+        return True
+    
+    @discord.ui.button(label="Reset kênh", style=discord.ButtonStyle.danger)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.confirmed = True
+        await interaction.response.edit_message(content="🔄 Đang reset kênh...", view=None)
+        self.stop()
+    
+    @discord.ui.button(label="Hủy", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="Đã hủy reset kênh.", view=None)
+        self.stop()
 
 class ClearCommands(commands.Cog):
     """Commands cog for message clearing functionality"""
@@ -27,16 +64,222 @@ class ClearCommands(commands.Cog):
         if member:
             return member, None
         
-        # 2. Nếu không có trong server, thử tìm global (User)
+        # 2. User đã biết (cache hoặc warm start snapshot), không tốn request
+        user = warm_start.get_user(self.bot, user_id)
+        if user:
+            return user, None
+        if warm_start.is_missing(user_id):
+            return int(user_id), None
+        
+        # 3. Nếu không có trong server, thử tìm global (User)
         try:
             user = await self.bot.fetch_user(user_id)
-            return user, None
+            return warm_start.remember_user(user), None
         except discord.NotFound:
-            # 3. Nếu không tìm thấy info (ví dụ user xóa acc), dùng luôn ID (Int)
+            # 4. Nếu không tìm thấy info (ví dụ user xóa acc), dùng luôn ID (Int)
+            warm_start.remember_missing(user_id)
             return int(user_id), None
         except discord.HTTPException:
             return int(user_id), None
 
+    # Đưa tin nhắn cũ hơn 14 ngày vào slow lane, trả về số tin nhắn đã xếp hàng
+    def _enqueue_deferred(self, guild, result, user_display, notify_channel, requester) -> int:
+        if not result.get('deferred'):
+            return 0
+        batch = slow_lane.enqueue(
+            guild.id,
+            result['deferred'],
+            label=user_display,
+            notify_channel_id=notify_channel.id,
+            requested_by=requester.id
+        )
+        return batch['total'] if batch else 0
+
+    # Chạy clear qua registry: yêu cầu trùng với job đang chạy sẽ chờ kết quả của job đó
+    async def _run_clear(self, guild, channel, scope, target_user, days, requester, user_display, on_attach=None):
+        target_id = target_user if isinstance(target_user, int) else target_user.id
+        defer_old = config.SLOW_LANE_ENABLED
+        
+        async def clear_all(progress):
+            # 7 ngày gần nhất để Discord xóa khi ban (nếu policy cho phép), phần cũ hơn quét từng kênh
+            if await softban_allowed(guild, target_id):
+                return await clear_user_messages_softban(
+                    guild, target_user, days, requester, defer_old=defer_old, progress=progress, ban_checked=True
+                )
+            return await clear_user_messages_all_channels(
+                guild, target_user, days, requester, defer_old=defer_old, progress=progress
+            )
+        
+        async def run_in_worker(progress):
+            # Gateway chỉ đưa job vào hàng chờ, worker.py chạy và báo tiến độ qua heartbeat
+            job_id = await job_queue.enqueue(
+                guild.id, target_id, None if scope == "all" else channel.id, days, requester.id
+            )
+            summary = await job_queue.wait(
+                job_id, progress, interval=config.JOB_QUEUE_POLL_SECONDS, claim_timeout=config.JOB_QUEUE_CLAIM_TIMEOUT
+            )
+            if summary is None:
+                # Không có worker nào đang chạy: job đã bị hủy trong hàng chờ, tự chạy trong bot
+                return await run_here(progress)
+            return expand_summary(summary)
+        
+        def run_here(progress):
+            if scope == "all":
+                return clear_all(progress)
+            return clear_user_messages(channel, target_user, days, requester, defer_old=defer_old)
+        
+        def start(progress):
+            if config.JOB_WORKERS_ENABLED:
+                return run_in_worker(progress)
+            return run_here(progress)
+        
+        result, job, attached = await clear_jobs.run(
+            guild.id, target_id, None if scope == "all" else channel.id, days, start, on_attach
+        )
+        if attached and result['success']:
+            # Job gốc chỉ quét tới lúc nó bắt đầu: quét thêm tin nhắn gửi sau đó
+            since = job.started_at - 1
+            if scope == "all":
+                tail = await clear_user_messages_all_channels(guild, target_user, days, requester, since=since)
+            else:
+                tail = await clear_user_messages(channel, target_user, days, requester, ranges=[(since, None)])
+            result = self._merge_tail(result, tail)
+        if attached:
+            # Job gốc đã đưa tin nhắn cũ vào slow lane
+            queued = result.get('deferred_count', 0)
+        else:
+            queued = self._enqueue_deferred(guild, result, user_display, channel, requester)
+        return result, job.scope, queued
+    
+    @staticmethod
+    def _merge_tail(result, tail):
+        """Add the counts of a follow-up scan to the result of the job it attached to"""
+        merged = dict(result)
+        deleted = tail.get('total_deleted', tail.get('deleted_count', 0))
+        errors = tail.get('total_errors', tail.get('errors', 0))
+        if 'total_deleted' in merged:
+            merged['total_deleted'] += deleted
+            merged['total_errors'] += errors
+        else:
+            merged['deleted_count'] += deleted
+            merged['errors'] += errors
+        if 'channels_with_messages' in merged:
+            channels = {ch['id']: dict(ch) for ch in merged['channels_with_messages']}
+            if 'channels_with_messages' in tail:
+                extra = tail['channels_with_messages']
+            elif tail.get('channel') is not None and tail['deleted_count']:
+                extra = [{
+                    'name': tail['channel'].name,
+                    'id': tail['channel'].id,
+                    'type': "voice" if isinstance(tail['channel'], discord.VoiceChannel) else "text",
+                    'deleted': tail['deleted_count'],
+                    'errors': tail['errors']
+                }]
+            else:
+                extra = []
+            for ch in extra:
+                stats = channels.setdefault(ch['id'], dict(ch, deleted=0, errors=0))
+                stats['deleted'] += ch['deleted']
+                stats['errors'] += ch['errors']
+            merged['channels_with_messages'] = list(channels.values())
+        return merged
+    
+    # Lấy nội dung các tin nhắn mẫu (ID trong kênh hiện tại hoặc link tin nhắn trong server)
+    async def _fetch_examples(self, channel, refs):
+        texts = []
+        for ref in refs:
+            parsed = parse_message_link(ref)
+            if parsed is None:
+                return None, f"`{ref}` không phải ID hoặc link tin nhắn"
+            channel_id, message_id = parsed
+            source = channel if channel_id is None else channel.guild.get_channel_or_thread(channel_id)
+            if source is None:
+                return None, f"Không tìm thấy kênh của tin nhắn `{message_id}` trong server này"
+            try:
+                message = await source.fetch_message(message_id)
+            except discord.NotFound:
+                return None, f"Không tìm thấy tin nhắn `{message_id}`"
+            except discord.HTTPException as e:
+                return None, f"Không đọc được tin nhắn `{message_id}`: {e}"
+            if not message.content:
+                return None, f"Tin nhắn `{message_id}` không có nội dung text"
+            texts.append(message.content)
+        return texts, None
+
+    # Quét tin nhắn gần giống mẫu (mọi người gửi), trả về (result, queued, error)
+    async def _run_similar(self, guild, channel, scope, refs, days, requester):
+        texts, error = await self._fetch_examples(channel, refs)
+        if error:
+            return None, 0, error
+        try:
+            matcher = SimilarityMatcher(
+                texts, config.SIMILARITY_THRESHOLD,
+                num_perm=config.SIMILARITY_NUM_PERM, bands=config.SIMILARITY_BANDS
+            )
+        except ValueError as e:
+            return None, 0, str(e)
+        
+        defer_old = config.SLOW_LANE_ENABLED
+        if scope == "all":
+            result = await clear_similar_messages_all_channels(guild, matcher, days, requester, defer_old=defer_old)
+        else:
+            result = await clear_similar_messages(channel, matcher, days, requester, defer_old=defer_old)
+        logger.info(f"Similarity sweep: {matcher.stats()}")
+        label = f"tin nhắn giống {len(texts)} mẫu spam"
+        return result, self._enqueue_deferred(guild, result, label, channel, requester), None
+
+    def _describe_job(self, job) -> str:
+        elapsed = int(time.time() - job.started_at)
+        text = f"Đang có lệnh clear giống vậy chạy từ {elapsed}s trước ({job.days} ngày, scope `{job.scope}`)"
+        if job.progress.get('channels_total'):
+            text += (
+                f"\nTiến độ: `{job.progress['channels_done']}/{job.progress['channels_total']}` kênh, "
+                f"`{job.progress['deleted']}` tin nhắn đã xóa"
+            )
+        return text + "\nKết quả sẽ được gửi khi job đó xong."
+
+    # Scope reset: xác nhận bằng nút bấm rồi clone + xóa kênh
+    async def _reset_flow(self, channel, requester, send):
+        if not isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
+            await send(content="❌ Chỉ reset được text/voice channel.")
+            return
+        permissions = channel.permissions_for(channel.guild.me)
+        if not permissions.manage_channels:
+            await send(content="❌ Bot cần quyền **Manage Channels** để reset kênh.")
+            return
+        
+        view = ResetConfirmView(requester.id)
+        prompt = await send(
+            content=f"⚠️ **Reset #{channel.name}?** Kênh sẽ được tạo lại (giữ tên, topic, quyền, slowmode, webhook) "
+                    f"và **toàn bộ tin nhắn, thread, tin nhắn ghim** sẽ mất vĩnh viễn.",
+            view=view
+        )
+        timed_out = await view.wait()
+        if not view.confirmed:
+            if timed_out:
+                await prompt.edit(content="⌛ Hết thời gian xác nhận, đã hủy reset kênh.", view=None)
+            return
+        
+        result = await reset_channel(channel, requester)
+        if not result['success']:
+            # Kênh gốc vẫn còn
+            await prompt.edit(content=f"❌ Lỗi: {result['error']}")
+            return
+        
+        embed = discord.Embed(
+            title="✅ Kênh Đã Được Reset",
+            description="Toàn bộ lịch sử tin nhắn của kênh đã bị xóa.",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Yêu cầu bởi", value=format_user_display(requester), inline=True)
+        embed.add_field(name="Webhook đã chuyển", value=f"`{result['webhooks_moved']}`", inline=True)
+        if result['webhooks_failed']:
+            embed.add_field(name="Webhook lỗi", value=f"`{result['webhooks_failed']}`", inline=True)
+        try:
+            await result['channel'].send(embed=embed)
+        except discord.HTTPException as e:
+            logger.warning(f"Không thể gửi thông báo vào kênh mới: {e}")
+
     # Helper để hiển thị tên đẹp (xử lý cả trường hợp là int)
     def _get_display_name(self, user_obj):
         if isinstance(user_obj, int):
@@ -44,16 +287,23 @@ class ClearCommands(commands.Cog):
         return format_user_display(user_obj)
 
     @commands.command(name='clear', help='Xóa tin nhắn của user trong số ngày được chỉ định')
-    @commands.check(lambda ctx: ctx.author == ctx.guild.owner)
+    @commands.check(lambda ctx: ctx.author.id == ctx.guild.owner_id)
     async def clear_messages(self, ctx, user_mention: str = None, days: str = None, scope: str = "current"):
         """
         Usage: {prefix}clear @user/user_id days [current|all]
+               {prefix}clear reset
         """
+        # Reset toàn bộ kênh, không cần user/days
+        if (user_mention or '').lower() == 'reset' or scope.lower() == 'reset':
+            await self._reset_flow(ctx.channel, ctx.author, lambda **kwargs: ctx.send(**kwargs))
+            return
+        
         # Validate parameters
         if not user_mention or not days:
             embed = discord.Embed(
                 title="❌ Lỗi Cú Pháp",
                 description=f"**Cách sử dụng:** `{config.BOT_PREFIX}clear @user/user_id days [current|all]`\n"
+                           f"hoặc `{config.BOT_PREFIX}clear reset` để xóa toàn bộ kênh\n"
                            f"**Ví dụ:** `{config.BOT_PREFIX}clear 123456789 7 all`",
                 color=discord.Color.red()
             )
@@ -63,7 +313,7 @@ class ClearCommands(commands.Cog):
         # Validate scope
         scope = scope.lower()
         if scope not in ['current', 'all']:
-            await ctx.send("❌ Scope phải là `current` hoặc `all`.")
+            await ctx.send("❌ Scope phải là `current`, `all` hoặc `reset`.")
             return
         
         # Validate days
@@ -107,11 +357,18 @@ class ClearCommands(commands.Cog):
         embed.add_field(name="Yêu cầu bởi", value=format_user_display(ctx.author), inline=True)
         status_message = await ctx.send(embed=embed)
         
-        # Perform the clearing operation
-        if scope == "all":
-            result = await clear_user_messages_all_channels(ctx.guild, target_user, days_int, ctx.author)
-        else:
-            result = await clear_user_messages(ctx.channel, target_user, days_int, ctx.author)
+        async def on_attach(job):
+            embed = discord.Embed(
+                title="🔁 Đang Chờ Job Trùng...",
+                description=self._describe_job(job),
+                color=discord.Color.blue()
+            )
+            await status_message.edit(embed=embed)
+        
+        # Perform the clearing operation (tin nhắn cũ hơn 14 ngày chuyển cho slow lane nếu bật)
+        result, scope, queued = await self._run_clear(
+            ctx.guild, ctx.channel, scope, target_user, days_int, ctx.author, user_display, on_attach
+        )
         
         # Update status message with results
         if result['success']:
@@ -123,6 +380,12 @@ class ClearCommands(commands.Cog):
                 )
                 embed.add_field(name="Tổng tin nhắn đã xóa", value=f"`{result['total_deleted']}`", inline=True)
                 embed.add_field(name="Kênh xử lý", value=f"`{result['channels_processed']}`", inline=True)
+                if result.get('softban_days'):
+                    embed.add_field(
+                        name="Xóa phía server",
+                        value=f"Tin nhắn {result['softban_days']} ngày gần nhất được Discord xóa qua softban (không tính vào tổng)",
+                        inline=False
+                    )
                 
                 # Show details
                 if result['channels_with_messages']:
@@ -141,6 +404,13 @@ class ClearCommands(commands.Cog):
                 )
                 embed.add_field(name="Tin nhắn đã xóa", value=f"`{result['deleted_count']}`", inline=True)
                 embed.add_field(name="Kênh", value=f"#{ctx.channel.name}", inline=True)
+            
+            if queued:
+                embed.add_field(
+                    name="Tin nhắn cũ (chạy nền)",
+                    value=f"`{queued}` tin nhắn cũ hơn 14 ngày đang được xóa dần, sẽ báo khi xong",
+                    inline=False
+                )
         else:
             embed = discord.Embed(
                 title="❌ Lỗi",
@@ -158,23 +428,118 @@ class ClearCommands(commands.Cog):
             logger.error(f"Lỗi lệnh clear: {error}")
             await ctx.send(f"❌ Lỗi hệ thống: {error}")
 
+    @commands.command(name='similar', help='Xóa tin nhắn gần giống tin nhắn mẫu (spam copy-paste) của mọi user')
+    @commands.check(lambda ctx: ctx.author.id == ctx.guild.owner_id)
+    async def clear_similar(self, ctx, days: str = None, scope: str = "current", *examples: str):
+        """
+        Usage: {prefix}similar days [current|all] message_id/link [message_id/link ...]
+               (hoặc reply tin nhắn mẫu: {prefix}similar days [current|all])
+        """
+        refs = list(examples)
+        # Scope có thể bỏ qua: tham số thứ hai không phải current/all là tin nhắn mẫu đầu tiên
+        if scope.lower() not in ['current', 'all']:
+            refs.insert(0, scope)
+            scope = "current"
+        scope = scope.lower()
+        if ctx.message.reference and ctx.message.reference.message_id:
+            refs.append(str(ctx.message.reference.message_id))
+        
+        if not days or not refs:
+            embed = discord.Embed(
+                title="❌ Lỗi Cú Pháp",
+                description=f"**Cách sử dụng:** `{config.BOT_PREFIX}similar days [current|all] message_id/link ...`\n"
+                           f"hoặc reply tin nhắn mẫu với `{config.BOT_PREFIX}similar days [current|all]`\n"
+                           f"**Ví dụ:** `{config.BOT_PREFIX}similar 3 all 123456789012345678`",
+                color=discord.Color.red()
+            )
+            await ctx.send(embed=embed)
+            return
+        
+        days_int = validate_days(days, config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT)
+        if not days_int:
+            await ctx.send(f"❌ Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}.")
+            return
+        
+        embed = discord.Embed(
+            title="🔄 Đang Xóa Tin Nhắn Giống Mẫu...",
+            description=f"Đang tìm tin nhắn giống **{len(refs)}** tin nhắn mẫu trong **{days_int} ngày** qua...",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Phạm vi", value="Tất cả kênh trong server" if scope == "all" else f"#{ctx.channel.name}", inline=True)
+        embed.add_field(name="Yêu cầu bởi", value=format_user_display(ctx.author), inline=True)
+        status_message = await ctx.send(embed=embed)
+        
+        result, queued, error = await self._run_similar(ctx.guild, ctx.channel, scope, refs, days_int, ctx.author)
+        
+        if result is None or not result['success']:
+            error = error or result.get('error', 'Unknown')
+            embed = discord.Embed(title="❌ Lỗi", description=f"Lỗi: {error}", color=discord.Color.red())
+        else:
+            embed = discord.Embed(
+                title="✅ Hoàn Thành",
+                description=f"Đã xóa tin nhắn giống **{len(refs)}** tin nhắn mẫu",
+                color=discord.Color.green()
+            )
+            if scope == "all":
+                embed.add_field(name="Tổng tin nhắn đã xóa", value=f"`{result['total_deleted']}`", inline=True)
+                embed.add_field(name="Kênh xử lý", value=f"`{result['channels_processed']}`", inline=True)
+                if result['channels_with_messages']:
+                    channels_info = "\n".join([
+                        f"• **{ch['name']}** ({ch['type']}): {ch['deleted']} tin nhắn"
+                        for ch in result['channels_with_messages'][:10]
+                    ])
+                    if len(result['channels_with_messages']) > 10:
+                        channels_info += f"\n• ... và {len(result['channels_with_messages']) - 10} kênh khác"
+                    embed.add_field(name="Chi tiết", value=channels_info, inline=False)
+            else:
+                embed.add_field(name="Tin nhắn đã xóa", value=f"`{result['deleted_count']}`", inline=True)
+                embed.add_field(name="Kênh", value=f"#{ctx.channel.name}", inline=True)
+            if queued:
+                embed.add_field(
+                    name="Tin nhắn cũ (chạy nền)",
+                    value=f"`{queued}` tin nhắn cũ hơn 14 ngày đang được xóa dần, sẽ báo khi xong",
+                    inline=False
+                )
+        
+        try:
+            await status_message.edit(embed=embed)
+        except discord.NotFound:
+            # Tin nhắn trạng thái giống mẫu nên có thể đã bị xóa cùng
+            await ctx.send(embed=embed)
+    
+    @clear_similar.error
+    async def clear_similar_error(self, ctx, error):
+        await self.clear_error(ctx, error)
+
     # Slash Commands
     @app_commands.command(name="clear", description="Xóa tin nhắn của user (kể cả đã out server)")
     @app_commands.describe(
         user="User cần xóa (Tag hoặc dán ID)",
         days="Số ngày (1-14)",
-        scope="Phạm vi: current hoặc all"
+        scope="Phạm vi: current, all hoặc reset (xóa toàn bộ kênh)"
     )
     @app_commands.choices(scope=[
         app_commands.Choice(name="Kênh hiện tại", value="current"),
-        app_commands.Choice(name="Tất cả kênh", value="all")
+        app_commands.Choice(name="Tất cả kênh", value="all"),
+        app_commands.Choice(name="Reset toàn bộ kênh hiện tại", value="reset")
     ])
-    async def slash_clear(self, interaction: discord.Interaction, user: str, days: int, scope: str = "current"):
+    async def slash_clear(self, interaction: discord.Interaction, user: str = None, days: int = None, scope: str = "current"):
         # Check permissions
-        if interaction.user != interaction.guild.owner:
+        if interaction.user.id != interaction.guild.owner_id:
             await interaction.response.send_message("❌ Chỉ Server Owner mới dùng được lệnh này.", ephemeral=True)
             return
         
+        if scope == "reset":
+            async def send(**kwargs):
+                await interaction.response.send_message(**kwargs)
+                return await interaction.original_response()
+            await self._reset_flow(interaction.channel, interaction.user, send)
+            return
+        
+        if not user or days is None:
+            await interaction.response.send_message("❌ Cần chọn `user` và `days` (trừ scope reset).", ephemeral=True)
+            return
+        
         # Validate days
         if not validate_days(str(days), config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT):
             await interaction.response.send_message(f"❌ Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}.", ephemeral=True)
@@ -198,20 +563,79 @@ class ClearCommands(commands.Cog):
         user_display = self._get_display_name(target_user)
         
         # Logic y hệt prefix command (có thể tách ra hàm chung để gọn code hơn, nhưng để thế này cho dễ hiểu)
-        if scope == "all":
-            result = await clear_user_messages_all_channels(interaction.guild, target_user, days, interaction.user)
-        else:
-            result = await clear_user_messages(interaction.channel, target_user, days, interaction.user)
+        async def on_attach(job):
+            await interaction.followup.send(f"🔁 {self._describe_job(job)}")
+        
+        result, scope, queued = await self._run_clear(
+            interaction.guild, interaction.channel, scope, target_user, days, interaction.user, user_display, on_attach
+        )
             
         if result['success']:
             msg = f"✅ **Hoàn tất xóa tin nhắn của {user_display}**\n"
+            if scope == 'all':
+                msg += f"• Tổng đã xóa: `{result['total_deleted']}`\n• Số kênh quét: `{result['channels_processed']}`"
+                if result.get('softban_days'):
+                    msg += f"\n• Tin nhắn {result['softban_days']} ngày gần nhất được Discord xóa phía server (softban)."
+            else:
+                msg += f"• Đã xóa: `{result['deleted_count']}` tại kênh này."
+            if queued:
+                msg += f"\n• `{queued}` tin nhắn cũ hơn 14 ngày đang được xóa dần, sẽ báo khi xong."
+            await interaction.followup.send(msg)
+        else:
+            await interaction.followup.send(f"❌ Lỗi: {result.get('error')}")
+
+    @app_commands.command(name="clear_similar", description="Xóa tin nhắn gần giống tin nhắn mẫu (spam copy-paste) của mọi user")
+    @app_commands.describe(
+        messages="ID hoặc link tin nhắn mẫu (cách nhau bằng dấu cách)",
+        days="Số ngày (1-14)",
+        scope="Phạm vi: current hoặc all"
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Kênh hiện tại", value="current"),
+        app_commands.Choice(name="Tất cả kênh", value="all")
+    ])
+    async def slash_clear_similar(self, interaction: discord.Interaction, messages: str, days: int, scope: str = "current"):
+        if interaction.user.id != interaction.guild.owner_id:
+            await interaction.response.send_message("❌ Chỉ Server Owner mới dùng được lệnh này.", ephemeral=True)
+            return
+        
+        if not validate_days(str(days), config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT):
+            await interaction.response.send_message(f"❌ Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}.", ephemeral=True)
+            return
+        
+        refs = messages.split()
+        if not refs:
+            await interaction.response.send_message("❌ Cần ít nhất một ID hoặc link tin nhắn mẫu.", ephemeral=True)
+            return
+        
+        await interaction.response.defer()
+        result, queued, error = await self._run_similar(
+            interaction.guild, interaction.channel, scope, refs, days, interaction.user
+        )
+        
+        if result is None:
+            await interaction.followup.send(f"❌ Lỗi: {error}")
+        elif result['success']:
+            msg = f"✅ **Hoàn tất xóa tin nhắn giống {len(refs)} mẫu spam**\n"
             if scope == 'all':
                 msg += f"• Tổng đã xóa: `{result['total_deleted']}`\n• Số kênh quét: `{result['channels_processed']}`"
             else:
                 msg += f"• Đã xóa: `{result['deleted_count']}` tại kênh này."
+            if queued:
+                msg += f"\n• `{queued}` tin nhắn cũ hơn 14 ngày đang được xóa dần, sẽ báo khi xong."
             await interaction.followup.send(msg)
         else:
             await interaction.followup.send(f"❌ Lỗi: {result.get('error')}")
 
+    @slash_clear.autocomplete('user')
+    async def slash_clear_user_autocomplete(self, interaction: discord.Interaction, current: str):
+        # Chỉ đọc index trong bộ nhớ, không gọi HTTP (Discord chỉ chờ 3 giây)
+        if interaction.guild is None or interaction.user.id != interaction.guild.owner_id:
+            return []
+        return [
+            app_commands.Choice(name=label, value=str(user_id))
+            for label, user_id in user_index.search(interaction.guild.id, current)
+        ]
+
 async def setup(bot):
     await bot.add_cog(ClearCommands(bot))
\ No newline at end of file
@@ -31,7 +31,8 @@ class HelpCommands(commands.Cog):
             value=f"```{config.BOT_PREFIX}clear @user/user_id days [current|all]```\n"
                   f"**Ví dụ:**\n"
                   f"• `{config.BOT_PREFIX}clear @JohnDoe 7` - Xóa trong kênh hiện tại\n"
-                  f"• `{config.BOT_PREFIX}clear @JohnDoe 7 all` - Xóa trong tất cả kênh",
+                  f"• `{config.BOT_PREFIX}clear @JohnDoe 7 all` - Xóa trong tất cả kênh\n"
+                  f"• `{config.BOT_PREFIX}clear reset` - Xóa toàn bộ kênh hiện tại (clone kênh, cần xác nhận)",
             inline=False
         )
         
@@ -50,7 +51,24 @@ class HelpCommands(commands.Cog):
             name="⚙️ **Tham Số**",
             value=f"• **@user/user_id**: Mention (@user) hoặc ID của user cần xóa tin nhắn\n"
                   f"• **days**: Số ngày (từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT})\n"
-                  f"• **scope**: `current` (kênh hiện tại) hoặc `all` (tất cả kênh) - mặc định là `current`",
+                  f"• **scope**: `current` (kênh hiện tại), `all` (tất cả kênh) hoặc `reset` (toàn bộ kênh hiện tại) - mặc định là `current`",
+            inline=False
+        )
+        
+        # Similar spam sweep
+        embed.add_field(
+            name=f"🧬 **Spam giống nhau: {config.BOT_PREFIX}similar** (hoặc /clear_similar)",
+            value=f"• `{config.BOT_PREFIX}similar 3 all <id/link tin nhắn mẫu> ...` - Xóa tin nhắn gần giống mẫu của mọi user\n"
+                  f"• Reply tin nhắn spam với `{config.BOT_PREFIX}similar 3 all` để dùng nó làm mẫu",
+            inline=False
+        )
+        
+        # Retention rules
+        embed.add_field(
+            name=f"🗓️ **Retention: {config.BOT_PREFIX}retention** (hoặc /retention)",
+            value=f"• `{config.BOT_PREFIX}retention users user1,user2 [current|all]` - Tự động xóa tin nhắn của các user\n"
+                  f"• `{config.BOT_PREFIX}retention age days [current|all]` - Tự động xóa tin nhắn cũ hơn N ngày\n"
+                  f"• `{config.BOT_PREFIX}retention list` / `remove id` / `run id`",
             inline=False
         )
         
@@ -68,6 +86,7 @@ class HelpCommands(commands.Cog):
             value="• **current**: Xóa tin nhắn chỉ trong kênh hiện tại (text/voice channel)\n"
                   "• **all**: Xóa tin nhắn trong TẤT CẢ kênh của server (text + voice)\n"
                   "• Tin nhắn cũ hơn 14 ngày sẽ được xóa từng cái một (chậm hơn)\n"
+                  "• **reset**: Tạo lại kênh và xóa kênh cũ - mất toàn bộ tin nhắn, thread và tin ghim (bot cần **Manage Channels**)\n"
                   "• Bot không thể xóa tin nhắn của chính nó thông qua lệnh này\n"
                   "• Scope `all` có thể mất nhiều thời gian hơn",
             inline=False
@@ -98,7 +117,8 @@ class HelpCommands(commands.Cog):
             value=f"```{config.BOT_PREFIX}clear @user/user_id days [current|all]```\n"
                   f"**Ví dụ:**\n"
                   f"• `{config.BOT_PREFIX}clear @JohnDoe 7` - Xóa trong kênh hiện tại\n"
-                  f"• `{config.BOT_PREFIX}clear @JohnDoe 7 all` - Xóa trong tất cả kênh",
+                  f"• `{config.BOT_PREFIX}clear @JohnDoe 7 all` - Xóa trong tất cả kênh\n"
+                  f"• `{config.BOT_PREFIX}clear reset` - Xóa toàn bộ kênh hiện tại (clone kênh, cần xác nhận)",
             inline=False
         )
         
@@ -117,7 +137,24 @@ class HelpCommands(commands.Cog):
             name="⚙️ **Tham Số**",
             value=f"• **@user/user_id**: Mention (@user) hoặc ID của user cần xóa tin nhắn\n"
                   f"• **days**: Số ngày (từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT})\n"
-                  f"• **scope**: `current` (kênh hiện tại) hoặc `all` (tất cả kênh) - mặc định là `current`",
+                  f"• **scope**: `current` (kênh hiện tại), `all` (tất cả kênh) hoặc `reset` (toàn bộ kênh hiện tại) - mặc định là `current`",
+            inline=False
+        )
+        
+        # Similar spam sweep
+        embed.add_field(
+            name=f"🧬 **Spam giống nhau: {config.BOT_PREFIX}similar** (hoặc /clear_similar)",
+            value=f"• `{config.BOT_PREFIX}similar 3 all <id/link tin nhắn mẫu> ...` - Xóa tin nhắn gần giống mẫu của mọi user\n"
+                  f"• Reply tin nhắn spam với `{config.BOT_PREFIX}similar 3 all` để dùng nó làm mẫu",
+            inline=False
+        )
+        
+        # Retention rules
+        embed.add_field(
+            name=f"🗓️ **Retention: {config.BOT_PREFIX}retention** (hoặc /retention)",
+            value=f"• `{config.BOT_PREFIX}retention users user1,user2 [current|all]` - Tự động xóa tin nhắn của các user\n"
+                  f"• `{config.BOT_PREFIX}retention age days [current|all]` - Tự động xóa tin nhắn cũ hơn N ngày\n"
+                  f"• `{config.BOT_PREFIX}retention list` / `remove id` / `run id`",
             inline=False
         )
         
@@ -135,6 +172,7 @@ class HelpCommands(commands.Cog):
             value="• **current**: Xóa tin nhắn chỉ trong kênh hiện tại (text/voice channel)\n"
                   "• **all**: Xóa tin nhắn trong TẤT CẢ kênh của server (text + voice)\n"
                   "• Tin nhắn cũ hơn 14 ngày sẽ được xóa từng cái một (chậm hơn)\n"
+                  "• **reset**: Tạo lại kênh và xóa kênh cũ - mất toàn bộ tin nhắn, thread và tin ghim (bot cần **Manage Channels**)\n"
                   "• Bot không thể xóa tin nhắn của chính nó thông qua lệnh này\n"
                   "• Scope `all` có thể mất nhiều thời gian hơn",
             inline=False
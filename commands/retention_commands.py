@@ -0,0 +1,218 @@
+"""
+Retention policy commands - Both prefix and slash commands, plus the background scheduler
+"""
+import discord
+from discord.ext import commands, tasks
+from discord import app_commands
+from typing import List, Optional
+from utils.logger import logger
+from utils.config import config
+from utils.helpers import parse_user_mention, validate_days
+from core.retention import retention_store, run_rule, describe_rule
+
+# Giới hạn số ngày cho rule 'age' (không bị giới hạn bởi MAX_DAYS_LIMIT)
+MAX_RETENTION_DAYS = 3650
+
+class RetentionCommands(commands.Cog):
+    """Commands cog for continuous retention rules"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        retention_store.load()
+        self.retention_loop.change_interval(minutes=config.RETENTION_INTERVAL_MINUTES)
+        self.retention_loop.start()
+
+    async def cog_unload(self):
+        self.retention_loop.cancel()
+
+    @tasks.loop(minutes=60)
+    async def retention_loop(self):
+        """Run every rule of every guild the bot is in"""
+        for rule in list(retention_store.rules):
+            guild = self.bot.get_guild(rule['guild_id'])
+            if guild is None:
+                continue
+            try:
+                await run_rule(guild, rule, retention_store)
+            except Exception as e:
+                logger.error(f"Lỗi retention rule #{rule['id']}: {e}")
+
+    @retention_loop.before_loop
+    async def before_retention_loop(self):
+        await self.bot.wait_until_ready()
+
+    # Helpers dùng chung cho prefix và slash
+    def _parse_users(self, raw_users: str) -> Optional[List[int]]:
+        user_ids = []
+        for token in raw_users.replace(',', ' ').split():
+            user_id = parse_user_mention(token)
+            if not user_id:
+                return None
+            user_ids.append(user_id)
+        return user_ids or None
+
+    def _scope_channels(self, channel, scope: str) -> Optional[List[int]]:
+        scope = scope.lower()
+        if scope == 'current':
+            return [channel.id]
+        if scope == 'all':
+            return []
+        return None
+
+    def _list_embed(self, guild: discord.Guild) -> discord.Embed:
+        rules = retention_store.rules_for_guild(guild.id)
+        embed = discord.Embed(title="🗓️ Retention Rules", color=discord.Color.blue())
+        if not rules:
+            embed.description = "Chưa có rule nào."
+        else:
+            embed.description = "\n".join(describe_rule(rule) for rule in rules)
+        embed.set_footer(text=f"Chạy mỗi {config.RETENTION_INTERVAL_MINUTES} phút")
+        return embed
+
+    async def _run_now(self, guild: discord.Guild, rule_id: int) -> str:
+        rule = retention_store.get_rule(guild.id, rule_id)
+        if rule is None:
+            return f"❌ Không tìm thấy rule #{rule_id}."
+        result = await run_rule(guild, rule, retention_store)
+        if result is None:
+            return f"⏳ Rule #{rule_id} đang chạy, thử lại sau."
+        return f"✅ Rule #{rule_id}: đã xóa `{result['deleted']}` tin nhắn trong `{result['channels']}` kênh, `{result['errors']}` lỗi."
+
+    # Prefix Commands
+    @commands.group(name='retention', invoke_without_command=True, help='Quản lý rule tự động xóa tin nhắn')
+    @commands.check(lambda ctx: ctx.author.id == ctx.guild.owner_id)
+    async def retention(self, ctx):
+        """
+        Usage: {prefix}retention [users|age|list|remove|run]
+        """
+        await ctx.send(embed=self._list_embed(ctx.guild))
+
+    @retention.command(name='users')
+    async def retention_users(self, ctx, users: str = None, scope: str = "current", days: str = None):
+        """
+        Usage: {prefix}retention users user1,user2 [current|all] [days]
+        """
+        user_ids = self._parse_users(users) if users else None
+        channel_ids = self._scope_channels(ctx.channel, scope)
+        if not user_ids or channel_ids is None:
+            await ctx.send(f"❌ **Cách sử dụng:** `{config.BOT_PREFIX}retention users user1,user2 [current|all] [days]`")
+            return
+        days_int = validate_days(days, config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT) if days else config.MAX_DAYS_LIMIT
+        if not days_int:
+            await ctx.send(f"❌ Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}.")
+            return
+        rule = retention_store.add_rule(ctx.guild.id, 'users', days_int, channel_ids, user_ids, ctx.author.id)
+        await ctx.send(f"✅ Đã tạo rule: {describe_rule(rule)}")
+
+    @retention.command(name='age')
+    async def retention_age(self, ctx, days: str = None, scope: str = "current"):
+        """
+        Usage: {prefix}retention age days [current|all]
+        """
+        days_int = validate_days(days, 1, MAX_RETENTION_DAYS) if days else None
+        channel_ids = self._scope_channels(ctx.channel, scope)
+        if not days_int or channel_ids is None:
+            await ctx.send(f"❌ **Cách sử dụng:** `{config.BOT_PREFIX}retention age days [current|all]` (days: 1-{MAX_RETENTION_DAYS})")
+            return
+        rule = retention_store.add_rule(ctx.guild.id, 'age', days_int, channel_ids, created_by=ctx.author.id)
+        await ctx.send(f"✅ Đã tạo rule: {describe_rule(rule)}")
+
+    @retention.command(name='list')
+    async def retention_list(self, ctx):
+        await ctx.send(embed=self._list_embed(ctx.guild))
+
+    @retention.command(name='remove')
+    async def retention_remove(self, ctx, rule_id: int):
+        if retention_store.remove_rule(ctx.guild.id, rule_id):
+            await ctx.send(f"✅ Đã xóa rule #{rule_id}.")
+        else:
+            await ctx.send(f"❌ Không tìm thấy rule #{rule_id}.")
+
+    @retention.command(name='run')
+    async def retention_run(self, ctx, rule_id: int):
+        await ctx.send(await self._run_now(ctx.guild, rule_id))
+
+    @retention.error
+    async def retention_error(self, ctx, error):
+        if isinstance(error, commands.CheckFailure):
+            await ctx.send("❌ Chỉ có **Server Owner** mới được sử dụng lệnh này.")
+        else:
+            logger.error(f"Lỗi lệnh retention: {error}")
+            await ctx.send(f"❌ Lỗi hệ thống: {error}")
+
+    # Slash Commands
+    slash_retention = app_commands.Group(name="retention", description="Quản lý rule tự động xóa tin nhắn")
+
+    async def _check_owner(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != interaction.guild.owner_id:
+            await interaction.response.send_message("❌ Chỉ Server Owner mới dùng được lệnh này.", ephemeral=True)
+            return False
+        return True
+
+    @slash_retention.command(name="users", description="Xóa liên tục tin nhắn của các user")
+    @app_commands.describe(
+        users="User ID/mention, cách nhau bởi dấu phẩy hoặc khoảng trắng",
+        scope="Phạm vi: current hoặc all",
+        days="Số ngày nhìn lại ở lần chạy đầu"
+    )
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Kênh hiện tại", value="current"),
+        app_commands.Choice(name="Tất cả kênh", value="all")
+    ])
+    async def slash_retention_users(self, interaction: discord.Interaction, users: str, scope: str = "current", days: int = None):
+        if not await self._check_owner(interaction):
+            return
+        user_ids = self._parse_users(users)
+        if not user_ids:
+            await interaction.response.send_message("❌ ID User không hợp lệ.", ephemeral=True)
+            return
+        days = days or config.MAX_DAYS_LIMIT
+        if not validate_days(str(days), config.MIN_DAYS_LIMIT, config.MAX_DAYS_LIMIT):
+            await interaction.response.send_message(f"❌ Số ngày phải từ {config.MIN_DAYS_LIMIT} đến {config.MAX_DAYS_LIMIT}.", ephemeral=True)
+            return
+        channel_ids = self._scope_channels(interaction.channel, scope)
+        rule = retention_store.add_rule(interaction.guild.id, 'users', days, channel_ids, user_ids, interaction.user.id)
+        await interaction.response.send_message(f"✅ Đã tạo rule: {describe_rule(rule)}")
+
+    @slash_retention.command(name="age", description="Xóa mọi tin nhắn cũ hơn N ngày")
+    @app_commands.describe(days=f"Số ngày (1-{MAX_RETENTION_DAYS})", scope="Phạm vi: current hoặc all")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Kênh hiện tại", value="current"),
+        app_commands.Choice(name="Tất cả kênh", value="all")
+    ])
+    async def slash_retention_age(self, interaction: discord.Interaction, days: int, scope: str = "current"):
+        if not await self._check_owner(interaction):
+            return
+        if not validate_days(str(days), 1, MAX_RETENTION_DAYS):
+            await interaction.response.send_message(f"❌ Số ngày phải từ 1 đến {MAX_RETENTION_DAYS}.", ephemeral=True)
+            return
+        channel_ids = self._scope_channels(interaction.channel, scope)
+        rule = retention_store.add_rule(interaction.guild.id, 'age', days, channel_ids, created_by=interaction.user.id)
+        await interaction.response.send_message(f"✅ Đã tạo rule: {describe_rule(rule)}")
+
+    @slash_retention.command(name="list", description="Danh sách retention rule")
+    async def slash_retention_list(self, interaction: discord.Interaction):
+        if not await self._check_owner(interaction):
+            return
+        await interaction.response.send_message(embed=self._list_embed(interaction.guild), ephemeral=True)
+
+    @slash_retention.command(name="remove", description="Xóa một retention rule")
+    async def slash_retention_remove(self, interaction: discord.Interaction, rule_id: int):
+        if not await self._check_owner(interaction):
+            return
+        if retention_store.remove_rule(interaction.guild.id, rule_id):
+            await interaction.response.send_message(f"✅ Đã xóa rule #{rule_id}.")
+        else:
+            await interaction.response.send_message(f"❌ Không tìm thấy rule #{rule_id}.", ephemeral=True)
+
+    @slash_retention.command(name="run", description="Chạy ngay một retention rule")
+    async def slash_retention_run(self, interaction: discord.Interaction, rule_id: int):
+        if not await self._check_owner(interaction):
+            return
+        await interaction.response.defer()
+        await interaction.followup.send(await self._run_now(interaction.guild, rule_id))
+
+async def setup(bot):
+    await bot.add_cog(RetentionCommands(bot))
@@ -0,0 +1,296 @@
+"""
+Per-channel author index - Bloom filter theo ngày để bỏ qua kênh mà user chưa từng nhắn
+"""
+import asyncio
+import base64
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.logger import logger
+from utils.config import config
+from utils.helpers import snowflake_timestamp
+
+DAY_SECONDS = 86400
+_MASK64 = (1 << 64) - 1
+
+def _mix64(value: int) -> int:
+    """splitmix64 finalizer - spreads sequential snowflakes over 64 bits"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over integer IDs"""
+    __slots__ = ('bits', 'size', 'hashes')
+
+    def __init__(self, size: int, hashes: int, data: Optional[bytes] = None):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(data) if data is not None else bytearray(size // 8)
+
+    def _positions(self, value: int):
+        mixed = _mix64(value)
+        h1 = mixed & 0xFFFFFFFF
+        h2 = (mixed >> 32) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: int) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: int) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+def _merge(intervals: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Merge overlapping/adjacent intervals"""
+    merged: List[List[float]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+class AuthorIndex:
+    """
+    Per-channel, per-day Bloom filters of message author IDs
+
+    A filter can only prove absence for the time the bot actually saw: gateway
+    sessions (live on_message) and ranges already paged by a sweep (backfill).
+    Everything else is reported as "must scan".
+    """
+
+    def __init__(self, path: str, size_bits: int, hashes: int, retention_days: int):
+        self.path = path
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.retention_days = retention_days
+        self.enabled = False
+        # channel_id -> {day_number -> BloomFilter}
+        self.filters: Dict[int, Dict[int, BloomFilter]] = {}
+        # Khoảng thời gian bot đã nhận event gateway (đã đóng)
+        self.sessions: List[Tuple[float, float]] = []
+        self.live_since: Optional[float] = None
+        self.disconnected_at: Optional[float] = None
+        # channel_id -> các khoảng đã được quét lại (backfill) bởi sweep
+        self.backfills: Dict[int, List[Tuple[float, float]]] = {}
+        # channel_id -> thời điểm từ đó index mới đáng tin (sau khi quyền thay đổi)
+        self.valid_from: Dict[int, float] = {}
+        self._dirty = False
+
+    # ----- Cập nhật -----
+
+    def add(self, channel_id: int, author_id: int, message_id: int) -> None:
+        """Record that author_id posted message_id in channel_id"""
+        day = int(snowflake_timestamp(message_id) // DAY_SECONDS)
+        days = self.filters.get(channel_id)
+        if days is None:
+            days = self.filters[channel_id] = {}
+        bloom = days.get(day)
+        if bloom is None:
+            bloom = days[day] = BloomFilter(self.size_bits, self.hashes)
+        bloom.add(author_id)
+        self._dirty = True
+
+    def observe_message(self, message) -> None:
+        """Feed a live gateway message (on_message)"""
+        if self.enabled and message.guild is not None:
+            self.add(message.channel.id, message.author.id, message.id)
+
+    def record_backfill(self, channel_id: int, start: float, end: float) -> None:
+        """Mark [start, end) of a channel as fully paged (all authors added)"""
+        if not self.enabled:
+            return
+        intervals = self.backfills.setdefault(channel_id, [])
+        intervals.append((start, end))
+        self.backfills[channel_id] = _merge(intervals)
+        self._dirty = True
+
+    def invalidate_channel(self, channel_id: int) -> None:
+        """Forget coverage of a channel (e.g. bot permissions changed)"""
+        self.valid_from[channel_id] = time.time()
+        self.backfills.pop(channel_id, None)
+        self._dirty = True
+
+    # ----- Gateway session -----
+
+    def session_started(self) -> None:
+        """Called on READY: events between the last disconnect and now were lost"""
+        now = time.time()
+        if self.live_since is not None:
+            self.sessions.append((self.live_since, self.disconnected_at or now))
+            self.sessions = _merge(self.sessions)
+        self.live_since = now
+        self.disconnected_at = None
+        self.enabled = True
+
+    def session_disconnected(self) -> None:
+        if self.live_since is not None and self.disconnected_at is None:
+            self.disconnected_at = time.time()
+
+    def session_resumed(self) -> None:
+        """RESUME replays missed events, so coverage is continuous"""
+        self.disconnected_at = None
+
+    # ----- Truy vấn -----
+
+    def _coverage(self, channel_id: int, start: float, end: float) -> List[Tuple[float, float]]:
+        """Intervals of [start, end) for which every message of the channel was indexed"""
+        intervals = list(self.sessions) + self.backfills.get(channel_id, [])
+        if self.live_since is not None:
+            intervals.append((self.live_since, self.disconnected_at or end))
+
+        floor = max(
+            start,
+            self.valid_from.get(channel_id, 0.0),
+            # Filter cũ hơn retention đã bị xóa nên không thể chứng minh vắng mặt
+            (int(time.time() // DAY_SECONDS) - self.retention_days + 1) * DAY_SECONDS
+        )
+        return _merge([(max(a, floor), min(b, end)) for a, b in intervals])
+
+    def ranges_to_scan(self, channel_id: int, author_id: int, start: float, end: float) -> List[Tuple[float, float]]:
+        """
+        Return the sub-ranges of [start, end) that may contain messages from author_id
+
+        Args:
+            channel_id: Channel ID
+            author_id: Target user ID
+            start: Window start (Unix timestamp)
+            end: Window end (Unix timestamp)
+
+        Returns:
+            Sorted, merged list of (start, end) ranges to page; empty means skip the channel
+        """
+        if not self.enabled:
+            return [(start, end)]
+
+        days = self.filters.get(channel_id, {})
+        ranges = []
+        cursor = start
+        for covered_start, covered_end in self._coverage(channel_id, start, end):
+            if covered_start > cursor:
+                ranges.append((cursor, covered_start))
+            day = int(covered_start // DAY_SECONDS)
+            while day * DAY_SECONDS < covered_end:
+                bloom = days.get(day)
+                if bloom is not None and author_id in bloom:
+                    ranges.append((
+                        max(covered_start, day * DAY_SECONDS),
+                        min(covered_end, (day + 1) * DAY_SECONDS)
+                    ))
+                day += 1
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            ranges.append((cursor, end))
+        return _merge(ranges)
+
+    # ----- Lưu trữ -----
+
+    def prune(self) -> None:
+        """Drop filters and coverage older than the retention window"""
+        oldest_day = int(time.time() // DAY_SECONDS) - self.retention_days + 1
+        floor = oldest_day * DAY_SECONDS
+        for channel_id in list(self.filters):
+            days = self.filters[channel_id]
+            for day in [d for d in days if d < oldest_day]:
+                del days[day]
+            if not days:
+                del self.filters[channel_id]
+        self.sessions = [(max(a, floor), b) for a, b in self.sessions if b > floor]
+        for channel_id in list(self.backfills):
+            kept = [(max(a, floor), b) for a, b in self.backfills[channel_id] if b > floor]
+            if kept:
+                self.backfills[channel_id] = kept
+            else:
+                del self.backfills[channel_id]
+
+    def save(self) -> None:
+        """Write the index to disk"""
+        self._write(self._snapshot())
+        self._dirty = False
+
+    def _snapshot(self) -> dict:
+        """Serializable copy of the index (built on the loop, so filters can't change mid-write)"""
+        self.prune()
+        now = time.time()
+        sessions = list(self.sessions)
+        if self.live_since is not None:
+            # Những gì nhận sau thời điểm lưu sẽ mất nếu bot crash, nên coverage chỉ tới now
+            sessions.append((self.live_since, self.disconnected_at or now))
+        data = {
+            'version': 1,
+            'size_bits': self.size_bits,
+            'hashes': self.hashes,
+            'saved_at': now,
+            'sessions': _merge(sessions),
+            'backfills': {str(cid): list(intervals) for cid, intervals in self.backfills.items()},
+            'valid_from': {str(cid): ts for cid, ts in self.valid_from.items()},
+            'filters': {
+                str(cid): {str(day): base64.b64encode(bloom.bits).decode('ascii') for day, bloom in days.items()}
+                for cid, days in self.filters.items()
+            }
+        }
+        return data
+
+    def _write(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """Load the index from disk (a missing or incompatible file starts empty)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Không thể đọc author index: {e}")
+            return
+
+        if data.get('size_bits') != self.size_bits or data.get('hashes') != self.hashes:
+            logger.info("Cấu hình Bloom filter đã thay đổi, bỏ qua author index cũ")
+            return
+
+        self.sessions = [tuple(iv) for iv in data.get('sessions', [])]
+        self.backfills = {int(cid): [tuple(iv) for iv in ivs] for cid, ivs in data.get('backfills', {}).items()}
+        self.valid_from = {int(cid): ts for cid, ts in data.get('valid_from', {}).items()}
+        self.filters = {
+            int(cid): {
+                int(day): BloomFilter(self.size_bits, self.hashes, base64.b64decode(raw))
+                for day, raw in days.items()
+            }
+            for cid, days in data.get('filters', {}).items()
+        }
+        self.prune()
+        logger.info(f"Đã tải author index: {len(self.filters)} kênh")
+
+    async def autosave(self, interval: float) -> None:
+        """Periodically save the index while it has changes"""
+        while True:
+            await asyncio.sleep(interval)
+            if self._dirty:
+                data = self._snapshot()
+                self._dirty = False
+                try:
+                    # Ghi file (vài MB JSON) ở thread riêng để không chặn gateway loop
+                    await asyncio.to_thread(self._write, data)
+                except OSError as e:
+                    self._dirty = True
+                    logger.warning(f"Không thể lưu author index: {e}")
+
+# Global index instance (enabled by the bot once the gateway session starts)
+author_index = AuthorIndex(
+    path=os.path.join(config.DATA_DIR, 'author_index.json'),
+    size_bits=config.AUTHOR_INDEX_BITS,
+    hashes=config.AUTHOR_INDEX_HASHES,
+    retention_days=config.AUTHOR_INDEX_DAYS
+)
@@ -0,0 +1,100 @@
+"""
+Channel reset - xóa toàn bộ lịch sử kênh bằng cách clone kênh rồi xóa kênh gốc
+"""
+import discord
+from typing import Union
+from utils.logger import logger
+from utils.helpers import format_user_display
+from core.retention import retention_store
+from core.slow_lane import slow_lane
+
+async def reset_channel(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    requester: discord.Member
+) -> dict:
+    """
+    Wipe a channel by replacing it with a clone
+
+    The clone keeps name, topic, category, permission overwrites, slowmode and
+    NSFW flag; webhooks are moved to it (their URLs keep working) and it takes
+    the original's position. Threads and pins are not carried over. If the
+    original cannot be deleted the clone is removed again.
+
+    Args:
+        channel: Channel to reset
+        requester: Member who requested the reset
+
+    Returns:
+        Dict with success, channel (the new channel), old_channel_id,
+        webhooks_moved, webhooks_failed (and error on failure)
+    """
+    guild = channel.guild
+    if channel in (guild.rules_channel, guild.public_updates_channel):
+        return {'success': False, 'error': 'Không thể reset kênh rules/updates của server Community'}
+
+    reason = f"Reset kênh bởi {format_user_display(requester)}"
+    position = channel.position
+    was_system_channel = guild.system_channel == channel
+    logger.info(f"Reset kênh #{channel.name} ({channel.id}) - {reason}")
+
+    try:
+        webhooks = await channel.webhooks()
+    except discord.Forbidden:
+        logger.warning("Thiếu quyền Manage Webhooks, webhook sẽ không được chuyển sang kênh mới")
+        webhooks = []
+
+    try:
+        new_channel = await channel.clone(reason=reason)
+    except discord.HTTPException as e:
+        logger.error(f"Không thể clone kênh: {e}")
+        return {'success': False, 'error': f'Không thể clone kênh: {e}'}
+
+    # Chuyển webhook (giữ nguyên URL) sang kênh mới
+    moved = []
+    failed = 0
+    for webhook in webhooks:
+        try:
+            await webhook.edit(channel=new_channel, reason=reason)
+            moved.append(webhook)
+        except discord.HTTPException as e:
+            logger.warning(f"Không thể chuyển webhook {webhook.name}: {e}")
+            failed += 1
+
+    try:
+        await channel.delete(reason=reason)
+    except discord.HTTPException as e:
+        logger.error(f"Không thể xóa kênh gốc, hủy reset: {e}")
+        for webhook in moved:
+            try:
+                await webhook.edit(channel=channel, reason=reason)
+            except discord.HTTPException:
+                pass
+        try:
+            await new_channel.delete(reason="Hủy reset kênh")
+        except discord.HTTPException:
+            pass
+        return {'success': False, 'error': f'Không thể xóa kênh gốc: {e}'}
+
+    try:
+        await new_channel.edit(position=position, reason=reason)
+    except discord.HTTPException as e:
+        logger.warning(f"Không thể khôi phục vị trí kênh: {e}")
+
+    if was_system_channel:
+        try:
+            await guild.edit(system_channel=new_channel, reason=reason)
+        except discord.HTTPException as e:
+            logger.warning(f"Không thể đặt lại system channel: {e}")
+
+    # Rule và hàng chờ đang trỏ tới kênh cũ
+    retention_store.replace_channel(channel.id, new_channel.id)
+    slow_lane.drop_channel(channel.id)
+
+    logger.info(f"Đã reset kênh #{channel.name}: kênh mới {new_channel.id}, {len(moved)} webhook đã chuyển")
+    return {
+        'success': True,
+        'channel': new_channel,
+        'old_channel_id': channel.id,
+        'webhooks_moved': len(moved),
+        'webhooks_failed': failed
+    }
@@ -0,0 +1,99 @@
+"""
+Clear job registry - gộp các lệnh clear trùng nhau vào job đang chạy (single-flight)
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+from utils.logger import logger
+
+class ClearJob:
+    """A running clear of one target user in a channel or a whole guild"""
+
+    def __init__(self, guild_id: int, user_id: int, channel_id: Optional[int], days: int):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        # None = scope all
+        self.channel_id = channel_id
+        self.days = days
+        self.started_at = time.time()
+        self.attached = 0
+        # Cập nhật bởi message_cleaner trong lúc chạy
+        self.progress: dict = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def scope(self) -> str:
+        return 'all' if self.channel_id is None else 'current'
+
+    def subsumes(self, guild_id: int, user_id: int, channel_id: Optional[int], days: int) -> bool:
+        """
+        Whether this job covers a request up to started_at (same target, same or wider scope and window)
+
+        The job's scan ends around started_at, so messages posted after it are
+        not covered; the caller clears that tail after the job finishes.
+        """
+        if self.guild_id != guild_id or self.user_id != user_id or self.days < days:
+            return False
+        return self.channel_id is None or self.channel_id == channel_id
+
+class ClearJobRegistry:
+    """
+    Running clear jobs, so duplicate requests wait for the existing job
+
+    A request that is identical to or subsumed by a running job gets that job's
+    result instead of starting its own scan. Only the messages posted since the
+    job started (job.started_at) remain for the caller to clear.
+    """
+
+    def __init__(self):
+        self.jobs: List[ClearJob] = []
+
+    def find(self, guild_id: int, user_id: int, channel_id: Optional[int], days: int) -> Optional[ClearJob]:
+        for job in self.jobs:
+            if job.subsumes(guild_id, user_id, channel_id, days):
+                return job
+        return None
+
+    async def run(
+        self,
+        guild_id: int,
+        user_id: int,
+        channel_id: Optional[int],
+        days: int,
+        start: Callable[[dict], Awaitable[dict]],
+        on_attach: Optional[Callable[[ClearJob], Awaitable[None]]] = None
+    ) -> Tuple[dict, ClearJob, bool]:
+        """
+        Run a clear, or attach to a running job that covers it
+
+        Args:
+            guild_id: Guild of the request
+            user_id: Target user ID
+            channel_id: Channel for scope current, None for scope all
+            days: Window in days
+            start: Called with the job's progress dict to start the clear
+            on_attach: Awaited when the request attaches to an existing job
+
+        Returns:
+            Tuple of (result, job, attached)
+        """
+        job = self.find(guild_id, user_id, channel_id, days)
+        if job is not None:
+            job.attached += 1
+            logger.info(
+                f"Gộp yêu cầu clear user {user_id} vào job đang chạy "
+                f"({job.scope}, {job.days} ngày, {job.attached} yêu cầu trùng)"
+            )
+            if on_attach is not None:
+                await on_attach(job)
+            # shield: hủy lệnh đang chờ không được hủy job của người khác
+            return await asyncio.shield(job.task), job, True
+
+        job = ClearJob(guild_id, user_id, channel_id, days)
+        job.task = asyncio.ensure_future(start(job.progress))
+        self.jobs.append(job)
+        job.task.add_done_callback(lambda _: self.jobs.remove(job))
+        return await asyncio.shield(job.task), job, False
+
+# Global registry shared by prefix and slash commands
+clear_jobs = ClearJobRegistry()
@@ -0,0 +1,92 @@
+"""
+Deletion registry - theo dõi message ID đang xóa hoặc vừa xóa để các job chồng nhau không xóa trùng
+"""
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Set
+from utils.config import config
+
+class DeletionRegistry:
+    """
+    Process-wide set of message IDs being deleted or recently confirmed deleted
+
+    Jobs claim IDs before deleting them: an ID already claimed by another job or
+    known to be gone is dropped, so overlapping jobs never pay for the same
+    deletion twice and bulk batches do not contain unknown messages.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight: Set[int] = set()
+        # message_id -> thời điểm xác nhận đã xóa
+        self._deleted: 'OrderedDict[int, float]' = OrderedDict()
+        self.skipped = 0
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        deleted = self._deleted
+        while deleted and (len(deleted) > self.max_entries or next(iter(deleted.values())) < cutoff):
+            deleted.popitem(last=False)
+
+    def is_deleted(self, message_id: int) -> bool:
+        return message_id in self._deleted
+
+    def is_in_flight(self, message_id: int) -> bool:
+        return message_id in self._in_flight
+
+    def claim(self, message_ids: Iterable[int]) -> List[int]:
+        """
+        Claim IDs for deletion
+
+        Args:
+            message_ids: Candidate message IDs
+
+        Returns:
+            The IDs this caller now owns (not in flight elsewhere, not already deleted)
+        """
+        self._expire()
+        claimed = []
+        for message_id in message_ids:
+            if message_id in self._in_flight or message_id in self._deleted:
+                self.skipped += 1
+                continue
+            self._in_flight.add(message_id)
+            claimed.append(message_id)
+        return claimed
+
+    def confirm(self, message_ids: Iterable[int]) -> None:
+        """Mark claimed IDs as deleted (or already gone)"""
+        now = time.monotonic()
+        for message_id in message_ids:
+            self._in_flight.discard(message_id)
+            self._deleted[message_id] = now
+            self._deleted.move_to_end(message_id)
+
+    def release(self, message_ids: Iterable[int]) -> None:
+        """Give back claimed IDs whose deletion failed"""
+        for message_id in message_ids:
+            self._in_flight.discard(message_id)
+
+    def mark_deleted(self, message_ids: Iterable[int]) -> None:
+        """Record deletions observed from gateway events"""
+        now = time.monotonic()
+        for message_id in message_ids:
+            # Tin nhắn đang được job khác claim cũng coi như xong, không để kẹt trong _in_flight
+            self._in_flight.discard(message_id)
+            self._deleted[message_id] = now
+            self._deleted.move_to_end(message_id)
+        self._expire()
+
+    def stats(self) -> dict:
+        return {
+            'in_flight': len(self._in_flight),
+            'recently_deleted': len(self._deleted),
+            'skipped': self.skipped
+        }
+
+# Global registry shared by every job in the process
+deletion_registry = DeletionRegistry(
+    ttl=config.DELETION_REGISTRY_TTL,
+    max_entries=config.DELETION_REGISTRY_MAX_ENTRIES
+)
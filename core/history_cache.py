@@ -0,0 +1,268 @@
+"""
+History page cache - LRU + TTL cache lịch sử kênh dùng chung giữa các job clear
+"""
+import asyncio
+import bisect
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+import discord
+from utils.config import config
+from utils.helpers import snowflake_timestamp
+
+# Chỉ giữ những field mà việc matching cần
+HistoryRecord = namedtuple('HistoryRecord', ('id', 'author_id', 'pinned'))
+# Record kèm nội dung cho matching theo nội dung (không lưu trong cache)
+ContentRecord = namedtuple('ContentRecord', HistoryRecord._fields + ('content',))
+
+class _Segment:
+    """Every message of a channel with lo <= id < hi, as fetched at fetched_at"""
+    __slots__ = ('channel_id', 'lo', 'hi', 'ids', 'authors', 'pinned', 'fetched_at')
+
+    def __init__(self, channel_id: int, lo: int, hi: int):
+        self.channel_id = channel_id
+        self.lo = lo
+        self.hi = hi
+        self.ids = array('Q')
+        self.authors = array('Q')
+        self.pinned = set()
+        self.fetched_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def records(self, lo: int, hi: int):
+        """Yield records with lo <= id < hi"""
+        start = bisect.bisect_left(self.ids, lo)
+        end = bisect.bisect_left(self.ids, hi)
+        # Copy lát cắt: job đang quét có thể xóa (discard) tin nhắn khỏi segment giữa chừng
+        ids = self.ids[start:end]
+        authors = self.authors[start:end]
+        pinned = set(self.pinned)
+        for message_id, author_id in zip(ids, authors):
+            yield HistoryRecord(message_id, author_id, message_id in pinned)
+
+    def discard(self, message_id: int) -> bool:
+        i = bisect.bisect_left(self.ids, message_id)
+        if i < len(self.ids) and self.ids[i] == message_id:
+            del self.ids[i]
+            del self.authors[i]
+            self.pinned.discard(message_id)
+            return True
+        return False
+
+class HistoryCache:
+    """
+    Bounded cache of fetched channel history, keyed by channel and snowflake range
+
+    A scan asks for [lo, hi) and gets cached segments for the parts already
+    fetched (and not expired), and live history only for the gaps. Segments are
+    contiguous ranges, so jobs with different cutoffs still share them.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_records: int,
+        enabled: bool = True,
+        partitions: int = 1,
+        partition_min_span: float = 0.0
+    ):
+        self.ttl = ttl
+        self.max_records = max_records
+        self.enabled = enabled
+        # Chia khoảng lớn thành nhiều khoảng con để đọc song song
+        self.partitions = max(1, partitions)
+        self.partition_min_span = partition_min_span
+        # LRU theo segment: key = (channel_id, lo)
+        self._lru: 'OrderedDict[Tuple[int, int], _Segment]' = OrderedDict()
+        # channel_id -> segments sorted by lo
+        self._channels: Dict[int, List[_Segment]] = {}
+        self._total = 0
+        self.hits = 0
+        self.fetched = 0
+
+    # ----- Quản lý segment -----
+
+    def _remove(self, segment: _Segment) -> None:
+        self._lru.pop((segment.channel_id, segment.lo), None)
+        segments = self._channels.get(segment.channel_id)
+        if segments and segment in segments:
+            segments.remove(segment)
+            if not segments:
+                del self._channels[segment.channel_id]
+        self._total -= len(segment)
+
+    def _store(self, segment: _Segment) -> None:
+        segments = self._channels.setdefault(segment.channel_id, [])
+        # Hai job có thể cùng fetch một khoảng trống, segment mới thay thế phần chồng lấn
+        for existing in [s for s in segments if s.lo < segment.hi and s.hi > segment.lo]:
+            self._remove(existing)
+        segments = self._channels.setdefault(segment.channel_id, [])
+        segments.insert(bisect.bisect_left([s.lo for s in segments], segment.lo), segment)
+        self._lru[(segment.channel_id, segment.lo)] = segment
+        self._total += len(segment)
+        while self._total > self.max_records and self._lru:
+            self._remove(next(iter(self._lru.values())))
+
+    def _valid_segments(self, channel_id: int, lo: int, hi: int) -> List[_Segment]:
+        """Non-expired segments overlapping [lo, hi), sorted by lo"""
+        now = time.monotonic()
+        result = []
+        for segment in list(self._channels.get(channel_id, [])):
+            if now - segment.fetched_at > self.ttl:
+                self._remove(segment)
+            elif segment.lo < hi and segment.hi > lo:
+                self._lru.move_to_end((channel_id, segment.lo))
+                result.append(segment)
+        return result
+
+    # ----- Đọc lịch sử -----
+
+    async def _fetch(self, channel, lo: int, hi: int, with_content: bool = False):
+        """
+        Page [lo, hi) from Discord, storing it as a segment when complete and small enough
+
+        With with_content ContentRecords are yielded; the segment is stored without content.
+        """
+        segment = _Segment(channel.id, lo, hi) if self.enabled else None
+        cap = self.max_records // 4
+        async for message in channel.history(
+            limit=None,
+            after=discord.Object(id=lo - 1),
+            before=discord.Object(id=hi),
+            oldest_first=True
+        ):
+            self.fetched += 1
+            if segment is not None:
+                if len(segment) >= cap:
+                    # Quá lớn để cache, chỉ stream
+                    segment = None
+                else:
+                    segment.ids.append(message.id)
+                    segment.authors.append(message.author.id)
+                    if message.pinned:
+                        segment.pinned.add(message.id)
+            if with_content:
+                yield ContentRecord(message.id, message.author.id, message.pinned, message.content)
+            else:
+                yield HistoryRecord(message.id, message.author.id, message.pinned)
+
+        # Chỉ lưu khi đã đọc trọn khoảng (generator không bị dừng giữa chừng)
+        if segment is not None:
+            self._store(segment)
+
+    async def _fetch_partitioned(self, channel, lo: int, hi: int, with_content: bool = False):
+        """
+        Page [lo, hi), splitting it into concurrent snowflake sub-ranges when it is large
+
+        Sub-ranges are disjoint and cover [lo, hi) exactly, so merging them yields
+        every message once. Records arrive in no particular order.
+        """
+        span = snowflake_timestamp(hi) - snowflake_timestamp(lo)
+        count = self.partitions
+        if count <= 1 or span < self.partition_min_span * count:
+            async for record in self._fetch(channel, lo, hi, with_content):
+                yield record
+            return
+
+        step = (hi - lo) // count
+        bounds = [lo + i * step for i in range(count)] + [hi]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+        done = object()
+
+        async def pump(part_lo: int, part_hi: int):
+            try:
+                async for record in self._fetch(channel, part_lo, part_hi, with_content):
+                    await queue.put(record)
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+
+        tasks = [asyncio.create_task(pump(bounds[i], bounds[i + 1])) for i in range(count)]
+        try:
+            remaining = count
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iter_range(self, channel, lo: int, hi: int):
+        """
+        Yield HistoryRecord for every message of channel with lo <= id < hi
+
+        Cached parts come oldest first; uncached gaps may be paged in parallel
+        partitions, so overall order is not guaranteed.
+
+        Args:
+            channel: Channel to read
+            lo: Lowest snowflake (inclusive)
+            hi: Highest snowflake (exclusive)
+        """
+        # Không có tin nhắn nào cũ hơn chính kênh
+        cursor = max(lo, channel.id)
+        for segment in (self._valid_segments(channel.id, cursor, hi) if self.enabled else []):
+            if segment.lo > cursor:
+                async for record in self._fetch_partitioned(channel, cursor, segment.lo):
+                    yield record
+            for record in segment.records(max(cursor, segment.lo), min(hi, segment.hi)):
+                self.hits += 1
+                yield record
+            cursor = max(cursor, segment.hi)
+        if cursor < hi:
+            async for record in self._fetch_partitioned(channel, cursor, hi):
+                yield record
+
+    async def iter_content(self, channel, lo: int, hi: int):
+        """
+        Yield ContentRecord for every message of channel with lo <= id < hi
+
+        Cached segments hold no content, so the whole range is paged live; the
+        pages are still stored for later author scans.
+        """
+        async for record in self._fetch_partitioned(channel, max(lo, channel.id), hi, with_content=True):
+            yield record
+
+    # ----- Invalidate -----
+
+    def discard(self, channel_id: int, message_ids: Iterable[int]) -> None:
+        """Remove deleted messages from cached segments"""
+        segments = self._channels.get(channel_id)
+        if not segments:
+            return
+        for message_id in message_ids:
+            for segment in segments:
+                if segment.lo <= message_id < segment.hi:
+                    if segment.discard(message_id):
+                        self._total -= 1
+                    break
+
+    def invalidate_channel(self, channel_id: int) -> None:
+        """Drop every cached segment of a channel"""
+        for segment in list(self._channels.get(channel_id, [])):
+            self._remove(segment)
+
+    def stats(self) -> dict:
+        return {
+            'segments': len(self._lru),
+            'records': self._total,
+            'hits': self.hits,
+            'fetched': self.fetched
+        }
+
+# Global cache instance shared by every job
+history_cache = HistoryCache(
+    ttl=config.HISTORY_CACHE_TTL,
+    max_records=config.HISTORY_CACHE_MAX_RECORDS,
+    enabled=config.HISTORY_CACHE_ENABLED,
+    partitions=config.SCAN_PARTITIONS,
+    partition_min_span=config.SCAN_PARTITION_MIN_HOURS * 3600
+)
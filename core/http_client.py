@@ -0,0 +1,136 @@
+"""
+HTTP-only Discord client helpers - chạy clear mà không cần kết nối gateway
+"""
+import discord
+from typing import List, Optional, Tuple, Union
+from utils.logger import logger
+from utils.profiler import create_http_trace
+from core.message_cleaner import clear_user_messages, clear_user_messages_all_channels
+
+# Các loại kênh mà message_cleaner có thể xử lý
+CLEARABLE_CHANNEL_TYPES = (discord.TextChannel, discord.VoiceChannel)
+
+async def create_http_client(token: str) -> discord.Client:
+    """
+    Create a client that is logged in to the REST API only
+
+    No gateway connection is opened, so there are no intents, no guild/member
+    cache and no command sync. Objects must be fetched explicitly.
+
+    Args:
+        token: Bot token
+
+    Returns:
+        Logged-in discord.Client (caller must close it)
+    """
+    client = discord.Client(intents=discord.Intents.none(), http_trace=create_http_trace())
+    try:
+        await client.login(token)
+    except Exception:
+        await client.close()
+        raise
+    return client
+
+async def fetch_guild_channels(
+    client: discord.Client,
+    guild_id: int
+) -> Tuple[discord.Guild, List[Union[discord.TextChannel, discord.VoiceChannel]]]:
+    """
+    Fetch a guild and its clearable channels over HTTP
+
+    Channels the bot cannot read are left out. There is no guild.me without a
+    gateway, so the bot member is fetched to compute permissions.
+
+    Args:
+        client: HTTP-only client
+        guild_id: Guild ID
+
+    Returns:
+        Tuple of (guild, list of text/voice channels)
+    """
+    guild = await client.fetch_guild(guild_id)
+    channels = [
+        channel for channel in await guild.fetch_channels()
+        if isinstance(channel, CLEARABLE_CHANNEL_TYPES)
+    ]
+    try:
+        me = await guild.fetch_member(client.user.id)
+    except discord.HTTPException as e:
+        # Không tính được quyền: quét mọi kênh như trước
+        logger.warning(f"Không thể lấy member của bot trong server {guild_id}: {e}")
+        return guild, channels
+
+    readable = [channel for channel in channels if channel.permissions_for(me).read_message_history]
+    if len(readable) < len(channels):
+        logger.info(f"Bỏ qua {len(channels) - len(readable)} kênh bot không đọc được")
+    return guild, readable
+
+def summarize_result(result: dict) -> dict:
+    """
+    Convert a message_cleaner result into a JSON-serializable summary
+
+    Args:
+        result: Result dict from clear_user_messages or clear_user_messages_all_channels
+
+    Returns:
+        Summary dict with plain values only
+    """
+    summary = {
+        'success': result['success'],
+        'deleted': result.get('total_deleted', result.get('deleted_count', 0)),
+        'errors': result.get('total_errors', result.get('errors', 0)),
+    }
+    if 'channels_processed' in result:
+        summary['channels_processed'] = result['channels_processed']
+        summary['channels'] = [
+            {'id': ch['id'], 'name': ch['name'], 'type': ch['type'], 'deleted': ch['deleted'], 'errors': ch['errors']}
+            for ch in result.get('channels_with_messages', [])
+        ]
+    if not result['success']:
+        summary['error'] = result.get('error', 'Unknown')
+    return summary
+
+async def run_http_clear(
+    client: discord.Client,
+    user_id: int,
+    days: int,
+    guild_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    progress: Optional[dict] = None
+) -> dict:
+    """
+    Run one clear job through an HTTP-only client
+
+    Exactly one of guild_id (all channels) or channel_id (single channel) must be given.
+
+    Args:
+        client: HTTP-only client
+        user_id: Target user ID
+        days: Number of days to look back
+        guild_id: Guild to sweep
+        channel_id: Channel to clear
+        progress: Dict updated in place while a guild sweep runs
+
+    Returns:
+        JSON-serializable summary (see summarize_result)
+    """
+    if (guild_id is None) == (channel_id is None):
+        raise ValueError("Cần chỉ định đúng một trong guild_id hoặc channel_id")
+
+    try:
+        if guild_id is not None:
+            guild, channels = await fetch_guild_channels(client, guild_id)
+            result = await clear_user_messages_all_channels(
+                guild, user_id, days, client.user, channels=channels, progress=progress
+            )
+        else:
+            channel = await client.fetch_channel(channel_id)
+            if not isinstance(channel, CLEARABLE_CHANNEL_TYPES):
+                return {'success': False, 'deleted': 0, 'errors': 1,
+                        'error': f'Kênh {channel_id} không phải text/voice channel'}
+            result = await clear_user_messages(channel, user_id, days, client.user)
+    except discord.HTTPException as e:
+        logger.error(f"Lỗi HTTP khi lấy guild/kênh: {e}")
+        return {'success': False, 'deleted': 0, 'errors': 1, 'error': str(e)}
+
+    return summarize_result(result)
@@ -0,0 +1,285 @@
+"""
+Job queue - hàng chờ clear bền vững (SQLite) giữa gateway và các worker process
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from utils.logger import logger
+from utils.config import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER,
+    days INTEGER NOT NULL,
+    requested_by INTEGER,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until);
+"""
+
+class JobQueue:
+    """
+    Durable queue of clear jobs shared by the gateway process and workers
+
+    The gateway enqueues jobs and polls them; workers claim a job with a lease,
+    extend it with heartbeats that also carry progress, and store the result.
+    A job whose lease runs out (worker crashed or hung) goes back to the queue,
+    up to max_attempts times. A job nobody claims in time while no worker holds
+    a live lease is cancelled, so the gateway can run it itself.
+
+    The async methods run their SQLite work in a thread (asyncio.to_thread) so a
+    busy database never blocks the event loop; the shared connection is
+    serialized by a lock.
+    """
+
+    def __init__(self, path: str, lease: float, max_attempts: int = 3):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # autocommit, transaction được mở thủ công khi claim; dùng từ thread của to_thread (có _lock)
+            self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ----- Gateway -----
+
+    async def enqueue(self, guild_id: int, user_id: int, channel_id: Optional[int], days: int,
+                      requested_by: Optional[int] = None) -> int:
+        """
+        Add a job (channel_id None = all channels of the guild)
+
+        Returns:
+            Job ID
+        """
+        return await asyncio.to_thread(self._enqueue, guild_id, user_id, channel_id, days, requested_by)
+
+    def _enqueue(self, guild_id: int, user_id: int, channel_id: Optional[int], days: int,
+                 requested_by: Optional[int]) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self.db.execute(
+                "INSERT INTO jobs (guild_id, user_id, channel_id, days, requested_by, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (guild_id, user_id, channel_id, days, requested_by, now, now)
+            )
+        logger.info(f"Job queue: job #{cursor.lastrowid} cho user {user_id} ({days} ngày)")
+        return cursor.lastrowid
+
+    def get(self, job_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['progress'] = json.loads(job['progress'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    async def wait(self, job_id: int, progress: Optional[dict] = None, interval: float = 1.0,
+                   claim_timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Poll a job until a worker finishes it
+
+        Args:
+            job_id: Job to wait for
+            progress: Dict updated in place with the progress reported by the worker
+            interval: Seconds between polls
+            claim_timeout: Cancel the job if it is still queued after this many
+                seconds and no worker holds a live lease (None = wait forever)
+
+        Returns:
+            The worker's result summary (see core.http_client.summarize_result),
+            or None if the job was cancelled because no worker claimed it
+        """
+        while True:
+            job = await asyncio.to_thread(self._read_job, job_id)
+            if job is None:
+                return {'success': False, 'deleted': 0, 'errors': 1, 'error': f'Job #{job_id} không tồn tại'}
+            if progress is not None:
+                progress.update(job['progress'])
+            if job['status'] in ('done', 'failed'):
+                return job['result'] or {'success': False, 'deleted': 0, 'errors': 1, 'error': 'Job thất bại'}
+            if (job['status'] == 'queued' and claim_timeout is not None
+                    and time.time() - job['created_at'] > claim_timeout):
+                if await asyncio.to_thread(self._cancel_unclaimed, job_id):
+                    logger.warning(f"Job queue: không có worker nào nhận job #{job_id}, đã hủy")
+                    return None
+            await asyncio.sleep(interval)
+
+    def _cancel_unclaimed(self, job_id: int) -> bool:
+        """Cancel a queued job unless some worker holds a live lease (it may just be busy)"""
+        now = time.time()
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued' "
+                "AND NOT EXISTS (SELECT 1 FROM jobs WHERE status = 'running' AND lease_until >= ?)",
+                (now, job_id, now)
+            )
+        return cursor.rowcount == 1
+
+    def _read_job(self, job_id: int) -> Optional[dict]:
+        # Kết nối riêng cho thread đọc (sqlite3 connection không dùng chung giữa các thread)
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        try:
+            row = db.execute("SELECT status, progress, result, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        return {
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'progress': json.loads(row['progress']),
+            'result': json.loads(row['result']) if row['result'] else None
+        }
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self.db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def prune(self, max_age: float) -> int:
+        """Delete finished (or cancelled) jobs older than max_age seconds"""
+        with self._lock:
+            cursor = self.db.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND updated_at < ?",
+                (time.time() - max_age,)
+            )
+        return cursor.rowcount
+
+    # ----- Worker -----
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        """
+        Take the oldest queued job (or one whose lease expired)
+
+        Returns:
+            The claimed job, or None if there is nothing to do
+        """
+        return await asyncio.to_thread(self._claim, worker_id)
+
+    def _claim(self, worker_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            db = self.db
+            # BEGIN IMMEDIATE: khóa ghi để hai worker không claim cùng một job
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # Job có lease hết hạn quá nhiều lần thì bỏ
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', updated_at = ?, "
+                    "result = '{\"success\": false, \"deleted\": 0, \"errors\": 1, \"error\": \"Worker dừng giữa chừng quá nhiều lần\"}' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                db.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + self.lease, now, row['id'])
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return self.get(row['id'])
+
+    async def heartbeat(self, job_id: int, worker_id: str, progress: dict) -> bool:
+        """
+        Extend the lease and publish progress
+
+        Returns:
+            False if the job was taken over by another worker
+        """
+        # Chụp progress trên event loop, task xóa vẫn đang cập nhật dict này
+        return await asyncio.to_thread(self._heartbeat, job_id, worker_id, json.dumps(progress))
+
+    def _heartbeat(self, job_id: int, worker_id: str, progress: str) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET lease_until = ?, progress = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + self.lease, progress, now, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    async def finish(self, job_id: int, worker_id: str, result: dict) -> None:
+        """Store the result of a job (status done or failed from result['success'])"""
+        await asyncio.to_thread(self._finish, job_id, worker_id, result)
+
+    def _finish(self, job_id: int, worker_id: str, result: dict) -> None:
+        status = 'done' if result.get('success') else 'failed'
+        with self._lock:
+            self.db.execute(
+                "UPDATE jobs SET status = ?, result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (status, json.dumps(result), time.time(), job_id, worker_id)
+            )
+
+def expand_summary(summary: dict) -> dict:
+    """
+    Turn a worker summary back into the result shape of core.message_cleaner
+
+    Args:
+        summary: Summary stored by the worker (core.http_client.summarize_result)
+
+    Returns:
+        Dict with the keys the clear commands read
+    """
+    result = {
+        'success': summary['success'],
+        'total_deleted': summary['deleted'],
+        'deleted_count': summary['deleted'],
+        'total_errors': summary['errors'],
+        'errors': summary['errors'],
+        'channels_processed': summary.get('channels_processed', 0),
+        'channels_with_messages': summary.get('channels', []),
+        'deferred_count': 0
+    }
+    if 'error' in summary:
+        result['error'] = summary['error']
+    return result
+
+# Global queue instance (gateway and worker.py open the same file)
+job_queue = JobQueue(
+    os.path.join(config.DATA_DIR, 'jobs.db'),
+    lease=config.JOB_QUEUE_LEASE_SECONDS
+)
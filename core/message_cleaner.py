@@ -2,16 +2,27 @@
 Message clearing logic - Updated for Kicked/Banned Users
 """
 import discord
-from datetime import datetime
-from typing import List, Union, Optional
+import time
+from typing import Awaitable, Callable, List, Tuple, Union, Optional
 from utils.logger import logger
-from utils.helpers import get_date_cutoff, format_user_display
+from utils.helpers import get_date_cutoff, format_user_display, snowflake_timestamp, timestamp_to_snowflake
+from utils.profiler import profile_job, get_job_profiler
+from core.worker_pool import worker_pool
+from core.author_index import author_index
+from core.history_cache import history_cache, HistoryRecord, ContentRecord
+from core.deletion_registry import deletion_registry
+from core.warm_start import warm_start
+
+# Discord chỉ cho phép bulk delete tin nhắn dưới 14 ngày tuổi
+BULK_DELETE_MAX_AGE = 14 * 86400
 
 async def clear_user_messages(
     channel: Union[discord.TextChannel, discord.VoiceChannel],
     user: Union[discord.Member, discord.User, int], # Update: Chấp nhận thêm int (ID)
     days: int,
-    requester: discord.Member
+    requester: discord.Member,
+    ranges: Optional[List[Tuple[float, Optional[float]]]] = None,
+    defer_old: bool = False
 ) -> dict:
     """
     Clear messages from a specific user (or user ID) in a channel
@@ -21,10 +32,12 @@ async def clear_user_messages(
         user: Target user object OR user ID (int) if user left server
         days: Number of days to look back
         requester: Member who requested the clear
+        ranges: (start, end) Unix timestamps to page instead of the whole window,
+            end=None means up to now (used by the sweep to skip ranges via author_index)
+        defer_old: Don't delete messages older than 14 days, return them in
+            result['deferred'] ({channel_id: [message_id]}) for the slow lane
     """
     cutoff_date = get_date_cutoff(days)
-    deleted_count = 0
-    errors = 0
     
     # Xử lý lấy ID mục tiêu và tên hiển thị cho Log
     if isinstance(user, int):
@@ -41,42 +54,121 @@ async def clear_user_messages(
     logger.info(f"Được yêu cầu bởi: {format_user_display(requester)}")
     logger.info(f"Kênh: #{channel.name} ({channel.id}) - {channel_type}")
     
+    if ranges is None:
+        ranges = [(cutoff_date.timestamp(), None)]
+    
+    with profile_job(f"clear-{channel.id}-{target_user_id}"):
+        # QUAN TRỌNG: So sánh ID thay vì so sánh object
+        result = await purge_channel(
+            channel, lambda record: record.author_id == target_user_id, ranges, defer_old=defer_old
+        )
+    
+    old_ids = result.pop('old_ids')
+    result['deferred'] = {channel.id: old_ids} if old_ids else {}
+    result['deferred_count'] = len(old_ids)
+    
+    if result['success']:
+        result.update({
+            'user': user,
+            'days': days,
+            'channel': channel,
+            'channel_type': channel_type
+        })
+    return result
+
+async def purge_channel(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    match: Callable[[HistoryRecord], bool],
+    ranges: List[Tuple[float, Optional[float]]],
+    defer_old: bool = False,
+    with_content: bool = False
+) -> dict:
+    """
+    Page the given time ranges of a channel and delete every message accepted by match
+    
+    Messages older than 14 days are collected during the scan and deleted one by
+    one only after every bulk delete of the channel is done, so recent messages
+    disappear first.
+    
+    Args:
+        channel: Discord text channel or voice channel
+        match: Predicate on a HistoryRecord (id, author_id, pinned) deciding whether to delete it
+        ranges: (start, end) Unix timestamps to page, end=None means up to now
+        defer_old: Leave messages older than 14 days to the caller instead of deleting them
+        with_content: Page live history and pass ContentRecords (with content) to match
+    
+    Returns:
+        Dict with success, deleted_count, errors, old_ids (IDs left to the caller,
+        empty unless defer_old), failed_ids (IDs whose delete failed) (and error on failure)
+    """
+    deleted_count = 0
+    errors = 0
+    old_ids: List[int] = []
+    failed_ids: List[int] = []
+    profiler = get_job_profiler()
+    
     try:
         # Get messages from the channel
-        messages_to_delete: List[discord.Message] = []
+        messages_to_delete: List[HistoryRecord] = []
+        index_enabled = author_index.enabled
         
-        async for message in channel.history(limit=None, after=cutoff_date):
-            # QUAN TRỌNG: So sánh ID thay vì so sánh object
-            if message.author.id == target_user_id:
-                messages_to_delete.append(message)
-                
-                # Discord allows bulk delete for messages younger than 14 days
-                if len(messages_to_delete) >= 100:  # Process in batches
-                    batch_deleted, batch_errors = await _delete_message_batch(
-                        channel, messages_to_delete
-                    )
-                    deleted_count += batch_deleted
-                    errors += batch_errors
-                    messages_to_delete.clear()
+        for range_start, range_end in ranges:
+            scan_started = time.time()
+            # Đọc qua history cache: phần đã có trong cache không tốn request (tìm theo nội dung luôn đọc trực tiếp)
+            read_range = history_cache.iter_content if with_content else history_cache.iter_range
+            history = profiler.timed_iter(read_range(
+                channel,
+                timestamp_to_snowflake(range_start),
+                timestamp_to_snowflake(range_end if range_end is not None else scan_started)
+            ), 'history_paging')
+            
+            async for record in history:
+                with profiler.phase('matching'):
+                    if index_enabled:
+                        author_index.add(channel.id, record.author_id, record.id)
+                    is_match = match(record)
+                if is_match:
+                    messages_to_delete.append(record)
+                    
+                    # Discord allows bulk delete for messages younger than 14 days
+                    if len(messages_to_delete) >= 100:  # Process in batches
+                        batch_deleted, batch_errors = await _delete_message_batch(
+                            channel, messages_to_delete, old_ids, failed_ids
+                        )
+                        deleted_count += batch_deleted
+                        errors += batch_errors
+                        messages_to_delete.clear()
+            
+            # Đã đọc hết khoảng này -> author index biết chắc ai đã nhắn trong đó
+            author_index.record_backfill(
+                channel.id, range_start, range_end if range_end is not None else scan_started
+            )
         
         # Delete remaining messages
         if messages_to_delete:
             batch_deleted, batch_errors = await _delete_message_batch(
-                channel, messages_to_delete
+                channel, messages_to_delete, old_ids, failed_ids
             )
             deleted_count += batch_deleted
             errors += batch_errors
         
+        # Phần chậm (xóa từng cái) chạy sau khi bulk delete đã xong
+        if old_ids and not defer_old:
+            old_deleted, old_errors = await delete_old_messages(channel, old_ids, failed_ids)
+            deleted_count += old_deleted
+            errors += old_errors
+            old_ids = []
+        
         logger.info(f"Hoàn thành xóa tin nhắn: {deleted_count} tin nhắn đã xóa, {errors} lỗi")
+        if old_ids:
+            logger.info(f"Để lại {len(old_ids)} tin nhắn cũ hơn 14 ngày cho slow lane")
         
         return {
             'success': True,
             'deleted_count': deleted_count,
             'errors': errors,
-            'user': user,
-            'days': days,
-            'channel': channel,
-            'channel_type': channel_type
+            'old_ids': old_ids,
+            'failed_ids': failed_ids
         }
         
     except discord.Forbidden:
@@ -85,7 +177,9 @@ async def clear_user_messages(
             'success': False,
             'error': 'Không có quyền xóa tin nhắn trong kênh này',
             'deleted_count': deleted_count,
-            'errors': errors + 1
+            'errors': errors + 1,
+            'old_ids': old_ids if defer_old else [],
+            'failed_ids': failed_ids
         }
     except Exception as e:
         logger.error(f"Lỗi khi xóa tin nhắn: {e}")
@@ -93,81 +187,178 @@ async def clear_user_messages(
             'success': False,
             'error': str(e),
             'deleted_count': deleted_count,
-            'errors': errors + 1
+            'errors': errors + 1,
+            'old_ids': old_ids if defer_old else [],
+            'failed_ids': failed_ids
         }
 
 async def _delete_message_batch(
     channel: Union[discord.TextChannel, discord.VoiceChannel],
-    messages: List[discord.Message]
+    messages: List[HistoryRecord],
+    old_ids: Optional[List[int]] = None,
+    failed_ids: Optional[List[int]] = None
 ) -> tuple[int, int]:
     """
     Delete a batch of messages
-    (Giữ nguyên logic cũ vì logic này xử lý Message object lấy từ history, không phụ thuộc user còn trong sv hay không)
+    (Chỉ cần message ID nên dùng được cho cả record lấy từ history cache)
+    
+    If old_ids is given, messages older than 14 days are appended to it instead
+    of being deleted one by one here. IDs whose delete failed are appended to
+    failed_ids if given.
     """
     deleted_count = 0
     error_count = 0
+    profiler = get_job_profiler()
+    
+    # Bỏ các tin nhắn mà job khác đang xóa hoặc đã bị xóa (tránh 404 và bulk delete lỗi)
+    message_ids = deletion_registry.claim(message.id for message in messages)
     
     # Separate messages by age (Discord bulk delete only works for messages < 14 days old)
-    now = datetime.now()
+    # Thời gian tạo lấy trực tiếp từ snowflake, không cần timezone
+    now = time.time()
     bulk_deletable = []
     individual_delete = []
     
-    for message in messages:
-        # Cần check message.created_at có timezone hay không để tránh lỗi so sánh
-        msg_created = message.created_at
-        if msg_created.tzinfo is not None:
-            msg_created = msg_created.replace(tzinfo=None)
-            
-        message_age = now - msg_created
-        if message_age.days < 14:
-            bulk_deletable.append(message)
+    for message_id in message_ids:
+        if now - snowflake_timestamp(message_id) < BULK_DELETE_MAX_AGE:
+            bulk_deletable.append(message_id)
         else:
-            individual_delete.append(message)
+            individual_delete.append(message_id)
+    
+    if old_ids is not None and individual_delete:
+        # Nhả claim: caller sẽ xóa (hoặc đưa vào slow lane) sau khi bulk delete xong
+        deletion_registry.release(individual_delete)
+        old_ids.extend(individual_delete)
+        individual_delete = []
     
     # Bulk delete recent messages
     if bulk_deletable:
-        try:
-            await channel.delete_messages(bulk_deletable)
-            deleted_count += len(bulk_deletable)
-            logger.info(f"Đã xóa {len(bulk_deletable)} tin nhắn (bulk delete)")
-        except discord.HTTPException as e:
-            logger.warning(f"Lỗi bulk delete, chuyển sang xóa từng tin nhắn: {e}")
-            # If bulk delete fails, delete individually
-            for message in bulk_deletable:
-                try:
-                    await message.delete()
-                    deleted_count += 1
-                except discord.HTTPException:
-                    error_count += 1
-    
-    # Delete old messages individually
-    for message in individual_delete:
-        try:
-            await message.delete()
-            deleted_count += 1
-        except discord.HTTPException as e:
-            logger.warning(f"Không thể xóa tin nhắn {message.id}: {e}")
-            error_count += 1
+        deleted = await _bulk_delete(channel, bulk_deletable, profiler)
+        if deleted is not None:
+            deleted_count += len(deleted)
+        else:
+            # If bulk delete fails, delete individually (tin nhắn đã bị xóa trong lúc đó thì chỉ cần xác nhận)
+            gone = [message_id for message_id in bulk_deletable if deletion_registry.is_deleted(message_id)]
+            deletion_registry.confirm(gone)
+            history_cache.discard(channel.id, gone)
+            individual_delete = [
+                message_id for message_id in bulk_deletable if not deletion_registry.is_deleted(message_id)
+            ] + individual_delete
     
+    # Delete old messages individually (chia cho main bot + helper tokens nếu có)
     if individual_delete:
-        logger.info(f"Đã xóa {len(individual_delete) - error_count}/{len(individual_delete)} tin nhắn cũ")
+        single_deleted, single_errors = await _delete_claimed_individually(channel, individual_delete, failed_ids)
+        deleted_count += single_deleted
+        error_count += single_errors
     
     return deleted_count, error_count
 
+async def delete_old_messages(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    message_ids: List[int],
+    failed_ids: Optional[List[int]] = None
+) -> Tuple[int, int]:
+    """
+    Delete messages one by one (for messages older than 14 days)
+    
+    Args:
+        channel: Channel owning the messages
+        message_ids: IDs of messages to delete
+        failed_ids: If given, IDs whose delete failed are appended to it
+    
+    Returns:
+        Tuple of (deleted_count, error_count)
+    """
+    claimed = deletion_registry.claim(message_ids)
+    if not claimed:
+        return 0, 0
+    return await _delete_claimed_individually(channel, claimed, failed_ids)
+
+async def _delete_claimed_individually(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    message_ids: List[int],
+    failed_ids: Optional[List[int]] = None
+) -> Tuple[int, int]:
+    """Delete claimed IDs one by one and settle them in the registry and cache"""
+    deleted_ids, missing_ids, error_count = await worker_pool.delete_individual(channel, message_ids)
+    deletion_registry.confirm(deleted_ids + missing_ids)
+    history_cache.discard(channel.id, deleted_ids + missing_ids)
+    deletion_registry.release(message_ids)
+    if failed_ids is not None and error_count:
+        settled = set(deleted_ids) | set(missing_ids)
+        failed_ids.extend(message_id for message_id in message_ids if message_id not in settled)
+    logger.info(f"Đã xóa {len(deleted_ids)}/{len(message_ids)} tin nhắn (xóa từng cái)")
+    return len(deleted_ids), error_count
+
+async def _bulk_delete(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    message_ids: List[int],
+    profiler
+) -> Optional[set]:
+    """
+    Bulk delete claimed message IDs
+    
+    If the request fails, IDs that were deleted meanwhile (seen through gateway
+    events) are dropped and the request is retried once before giving up.
+    
+    Returns:
+        Set of IDs deleted by this call, or None if bulk delete failed
+    """
+    for attempt in range(2):
+        try:
+            with profiler.phase('bulk_delete'):
+                await channel.delete_messages([discord.Object(id=message_id) for message_id in message_ids])
+            deletion_registry.confirm(message_ids)
+            history_cache.discard(channel.id, message_ids)
+            logger.info(f"Đã xóa {len(message_ids)} tin nhắn (bulk delete)")
+            return set(message_ids)
+        except discord.HTTPException as e:
+            remaining = [message_id for message_id in message_ids if not deletion_registry.is_deleted(message_id)]
+            if attempt == 0 and len(remaining) < len(message_ids):
+                logger.info(f"Bulk delete lỗi do {len(message_ids) - len(remaining)} tin nhắn đã bị xóa, thử lại")
+                deletion_registry.confirm(set(message_ids) - set(remaining))
+                history_cache.discard(channel.id, set(message_ids) - set(remaining))
+                message_ids = remaining
+                if not message_ids:
+                    return set()
+                continue
+            logger.warning(f"Lỗi bulk delete, chuyển sang xóa từng tin nhắn: {e}")
+            return None
+    return None
+
 async def clear_user_messages_all_channels(
     guild: discord.Guild,
     user: Union[discord.Member, discord.User, int], # Update: Chấp nhận int
     days: int,
-    requester: discord.Member
+    requester: discord.Member,
+    channels: Optional[List[Union[discord.TextChannel, discord.VoiceChannel]]] = None,
+    defer_old: bool = False,
+    progress: Optional[dict] = None,
+    until: Optional[float] = None,
+    since: Optional[float] = None
 ) -> dict:
     """
     Clear messages from a specific user in all channels of a guild
-    """
-    total_deleted = 0
-    total_errors = 0
-    channels_processed = 0
-    channels_with_messages = []
     
+    Args:
+        guild: Discord guild
+        user: Target user object OR user ID (int) if user left server
+        days: Number of days to look back
+        requester: Member who requested the clear
+        channels: Channels to sweep instead of guild.channels (HTTP-only clients
+            have no channel cache, so they pass the result of guild.fetch_channels())
+        defer_old: Don't delete messages older than 14 days, return them in
+            result['deferred'] ({channel_id: [message_id]}) for the slow lane
+        progress: Dict updated in place with channels_total, channels_done and
+            deleted while the sweep runs (read by requests attached to the job)
+        until: Only clear messages older than this Unix timestamp (None = up to now),
+            used when the recent part was already removed server-side
+        since: Only clear messages newer than this Unix timestamp instead of the
+            whole `days` window (follow-up of a job that already swept the rest)
+    
+    Bulk-deletable messages of every channel are removed before any message
+    older than 14 days is deleted one by one.
+    """
     # Xử lý hiển thị log
     target_display_name = f"User ID: {user}" if isinstance(user, int) else format_user_display(user)
 
@@ -175,10 +366,154 @@ async def clear_user_messages_all_channels(
     logger.info(f"Server: {guild.name} ({guild.id})")
     logger.info(f"Được yêu cầu bởi: {format_user_display(requester)}")
     
+    target_user_id = user if isinstance(user, int) else user.id
+    with profile_job(f"clear-all-{guild.id}-{target_user_id}"):
+        return await _clear_all_channels(
+            guild, user, days, requester, channels, defer_old, progress if progress is not None else {}, until, since
+        )
+
+async def clear_similar_messages(
+    channel: Union[discord.TextChannel, discord.VoiceChannel],
+    matcher: Callable[[ContentRecord], bool],
+    days: int,
+    requester: discord.Member,
+    defer_old: bool = False
+) -> dict:
+    """
+    Clear messages of any author whose content the matcher flags as near-duplicate spam
+    
+    Args:
+        channel: Discord text channel or voice channel
+        matcher: Predicate on a ContentRecord (see core.similarity.SimilarityMatcher)
+        days: Number of days to look back
+        requester: Member who requested the clear
+        defer_old: Return messages older than 14 days in result['deferred'] instead of deleting them
+    """
+    channel_type = "voice chat" if isinstance(channel, discord.VoiceChannel) else "text chat"
+    logger.info(f"Bắt đầu xóa tin nhắn giống mẫu spam trong {days} ngày qua")
+    logger.info(f"Được yêu cầu bởi: {format_user_display(requester)}")
+    logger.info(f"Kênh: #{channel.name} ({channel.id}) - {channel_type}")
+    
+    with profile_job(f"similar-{channel.id}"):
+        result = await purge_channel(
+            channel, matcher, [(get_date_cutoff(days).timestamp(), None)], defer_old=defer_old, with_content=True
+        )
+    
+    old_ids = result.pop('old_ids')
+    result['deferred'] = {channel.id: old_ids} if old_ids else {}
+    result['deferred_count'] = len(old_ids)
+    
+    if result['success']:
+        result.update({
+            'days': days,
+            'channel': channel,
+            'channel_type': channel_type
+        })
+    return result
+
+async def clear_similar_messages_all_channels(
+    guild: discord.Guild,
+    matcher: Callable[[ContentRecord], bool],
+    days: int,
+    requester: discord.Member,
+    channels: Optional[List[Union[discord.TextChannel, discord.VoiceChannel]]] = None,
+    defer_old: bool = False,
+    progress: Optional[dict] = None
+) -> dict:
+    """
+    Clear near-duplicate spam in all channels of a guild in a single pass per channel
+    
+    Takes the same channels, defer_old and progress arguments and returns the
+    same result shape as clear_user_messages_all_channels.
+    """
+    logger.info("Bắt đầu xóa tin nhắn giống mẫu spam trong tất cả kênh")
+    logger.info(f"Server: {guild.name} ({guild.id})")
+    logger.info(f"Được yêu cầu bởi: {format_user_display(requester)}")
+    
+    async def clear_channel(channel):
+        return await clear_similar_messages(channel, matcher, days, requester, defer_old=True)
+    
+    with profile_job(f"similar-all-{guild.id}"):
+        result = await _sweep_channels(
+            guild, channels, get_date_cutoff(days).timestamp(), defer_old,
+            progress if progress is not None else {}, clear_channel
+        )
+    if result['success']:
+        result.update({'days': days, 'guild': guild})
+    return result
+
+def _inactive_since(channel: Union[discord.TextChannel, discord.VoiceChannel], start: float) -> bool:
+    """
+    Whether the channel certainly has no message newer than start
+    
+    last_message_id is only trusted when the client receives message events,
+    otherwise it may be older than the real last message.
+    """
+    last_message_id = channel.last_message_id
+    if last_message_id is None or not channel._state.intents.guild_messages:
+        return False
+    return snowflake_timestamp(last_message_id) < start
+
+async def _clear_all_channels(
+    guild: discord.Guild,
+    user: Union[discord.Member, discord.User, int],
+    days: int,
+    requester: discord.Member,
+    channels: Optional[List[Union[discord.TextChannel, discord.VoiceChannel]]],
+    defer_old: bool,
+    progress: dict,
+    until: Optional[float] = None,
+    since: Optional[float] = None
+) -> dict:
+    """Sweep every channel for clear_user_messages_all_channels (runs inside the job profiler)"""
+    target_user_id = user if isinstance(user, int) else user.id
+    window_start = since if since is not None else get_date_cutoff(days).timestamp()
+    
+    async def clear_channel(channel):
+        # Author index: bỏ qua các khoảng thời gian mà user chắc chắn không nhắn
+        window_end = until if until is not None else time.time()
+        ranges = author_index.ranges_to_scan(channel.id, target_user_id, window_start, window_end)
+        if not ranges:
+            return None
+        if until is None and ranges[-1][1] >= window_end:
+            ranges[-1] = (ranges[-1][0], None)
+        
+        # Gọi hàm clear_user_messages (đã update ở trên), tin nhắn cũ để lại cho phase sau
+        return await clear_user_messages(channel, user, days, requester, ranges=ranges, defer_old=True)
+    
+    result = await _sweep_channels(guild, channels, window_start, defer_old, progress, clear_channel)
+    if result['success']:
+        result.update({'user': user, 'days': days, 'guild': guild})
+    return result
+
+async def _sweep_channels(
+    guild: discord.Guild,
+    channels: Optional[List[Union[discord.TextChannel, discord.VoiceChannel]]],
+    window_start: float,
+    defer_old: bool,
+    progress: dict,
+    clear_channel: Callable[[Union[discord.TextChannel, discord.VoiceChannel]], Awaitable[Optional[dict]]]
+) -> dict:
+    """
+    Run clear_channel on every readable, recently active channel of a guild
+    
+    clear_channel must leave messages older than 14 days in result['deferred'];
+    they are deleted after every channel is done (or returned if defer_old).
+    Returning None counts the channel as skipped.
+    """
+    total_deleted = 0
+    total_errors = 0
+    channels_processed = 0
+    channels_skipped = 0
+    # channel_id -> thống kê, chỉ những kênh có tin nhắn bị xóa được đưa vào kết quả
+    channel_stats = {}
+    # Tin nhắn cũ hơn 14 ngày, xử lý sau khi mọi kênh đã bulk delete xong
+    deferred = {}
+    
     try:
         # Get all text and voice channels in the guild
         all_channels = []
-        for channel in guild.channels:
+        for channel in (channels if channels is not None else guild.channels):
             if isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
                 all_channels.append(channel)
         
@@ -189,55 +524,96 @@ async def clear_user_messages_all_channels(
                 'total_errors': 0,
                 'channels_processed': 0,
                 'channels_with_messages': [],
+                'deferred': {},
+                'deferred_count': 0,
                 'message': 'Không có kênh nào trong server'
             }
         
         logger.info(f"Tìm thấy {len(all_channels)} kênh(s)")
+        # Kênh hoạt động gần đây trước (spam mới nằm ở đó), dùng cả hoạt động lưu từ lần chạy trước
+        all_channels.sort(key=lambda channel: warm_start.last_activity(channel) or 0, reverse=True)
+        progress.update({'channels_total': len(all_channels), 'channels_done': 0, 'deleted': 0})
         
         # Process each channel
         for channel in all_channels:
             try:
-                permissions = channel.permissions_for(guild.me)
-                if not permissions.read_message_history:
-                    # Bỏ qua warning log để đỡ spam console nếu server lớn
+                # guild.me là None khi chạy bằng HTTP-only client (không có member cache)
+                if guild.me is not None:
+                    permissions = channel.permissions_for(guild.me)
+                    if not permissions.read_message_history:
+                        # Bỏ qua warning log để đỡ spam console nếu server lớn
+                        continue
+                
+                if _inactive_since(channel, window_start):
+                    channels_skipped += 1
                     continue
                 
-                # Gọi hàm clear_user_messages (đã update ở trên)
-                result = await clear_user_messages(channel, user, days, requester)
+                result = await clear_channel(channel)
+                if result is None:
+                    channels_skipped += 1
+                    continue
                 channels_processed += 1
+                deferred.update(result['deferred'])
                 
                 if result['success']:
                     total_deleted += result['deleted_count']
                     total_errors += result['errors']
-                    
-                    if result['deleted_count'] > 0:
-                        channel_type = "voice" if isinstance(channel, discord.VoiceChannel) else "text"
-                        channels_with_messages.append({
-                            'name': channel.name,
-                            'id': channel.id,
-                            'type': channel_type,
-                            'deleted': result['deleted_count'],
-                            'errors': result['errors']
-                        })
+                    channel_stats[channel.id] = {
+                        'name': channel.name,
+                        'id': channel.id,
+                        'type': "voice" if isinstance(channel, discord.VoiceChannel) else "text",
+                        'deleted': result['deleted_count'],
+                        'errors': result['errors']
+                    }
                 else:
                     total_errors += 1
                     
             except Exception as e:
                 logger.error(f"Lỗi khi xử lý kênh '{channel.name}': {e}")
                 total_errors += 1
+            finally:
+                progress['channels_done'] += 1
+                progress['deleted'] = total_deleted
+        
+        # Phase chậm: xóa từng tin nhắn cũ, trừ khi caller chuyển chúng cho slow lane
+        if deferred and not defer_old:
+            channels_by_id = {channel.id: channel for channel in all_channels}
+            for channel_id, old_ids in deferred.items():
+                channel = channels_by_id[channel_id]
+                old_deleted, old_errors = await delete_old_messages(channel, old_ids)
+                total_deleted += old_deleted
+                total_errors += old_errors
+                stats = channel_stats.setdefault(channel_id, {
+                    'name': channel.name,
+                    'id': channel.id,
+                    'type': "voice" if isinstance(channel, discord.VoiceChannel) else "text",
+                    'deleted': 0,
+                    'errors': 0
+                })
+                stats['deleted'] += old_deleted
+                stats['errors'] += old_errors
+                progress['deleted'] = total_deleted
+            deferred = {}
+        
+        channels_with_messages = [stats for stats in channel_stats.values() if stats['deleted'] > 0]
+        deferred_count = sum(len(old_ids) for old_ids in deferred.values())
         
         logger.info(f"Hoàn thành xóa tin nhắn trong {channels_processed} kênh(s)")
+        if channels_skipped:
+            logger.info(f"Bỏ qua {channels_skipped} kênh(s) không có hoạt động / không cần quét")
         logger.info(f"Tổng cộng: {total_deleted} tin nhắn đã xóa, {total_errors} lỗi")
+        if deferred_count:
+            logger.info(f"Để lại {deferred_count} tin nhắn cũ hơn 14 ngày cho slow lane")
         
         return {
             'success': True,
             'total_deleted': total_deleted,
             'total_errors': total_errors,
             'channels_processed': channels_processed,
+            'channels_skipped': channels_skipped,
             'channels_with_messages': channels_with_messages,
-            'user': user,
-            'days': days,
-            'guild': guild
+            'deferred': deferred,
+            'deferred_count': deferred_count
         }
         
     except Exception as e:
@@ -247,5 +623,7 @@ async def clear_user_messages_all_channels(
             'error': str(e),
             'total_deleted': total_deleted,
             'total_errors': total_errors + 1,
-            'channels_processed': channels_processed
+            'channels_processed': channels_processed,
+            'deferred': deferred if defer_old else {},
+            'deferred_count': sum(len(old_ids) for old_ids in deferred.values()) if defer_old else 0
         }
\ No newline at end of file
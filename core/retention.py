@@ -0,0 +1,264 @@
+"""
+Retention policies - tự động xóa tin nhắn theo rule, mỗi lần chỉ đọc lịch sử mới (high-water mark)
+"""
+import asyncio
+import json
+import os
+import time
+import discord
+from typing import Dict, List, Optional, Union
+from utils.logger import logger
+from utils.config import config
+from utils.helpers import DISCORD_EPOCH, snowflake_timestamp, timestamp_to_snowflake
+from utils.profiler import profile_job
+from core.message_cleaner import purge_channel, delete_old_messages
+from core.deletion_registry import deletion_registry
+from core.slow_lane import slow_lane
+
+DAY_SECONDS = 86400
+# Số lần thử lại một tin nhắn xóa lỗi trước khi bỏ qua
+RETRY_LIMIT = 3
+
+# users: xóa liên tục tin nhắn của các user; age: xóa mọi tin nhắn cũ hơn N ngày
+RULE_KINDS = ('users', 'age')
+
+# rule_id -> lock: lần chạy theo lịch và `retention run` không chạy cùng một rule song song
+_rule_locks: Dict[int, asyncio.Lock] = {}
+
+class RetentionStore:
+    """Persisted list of retention rules"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rules: List[dict] = []
+        self.next_id = 1
+
+    def load(self) -> None:
+        """Load rules from disk (missing file means no rules)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Không thể đọc retention rules: {e}")
+            return
+        self.rules = data.get('rules', [])
+        self.next_id = data.get('next_id', len(self.rules) + 1)
+        logger.info(f"Đã tải {len(self.rules)} retention rule(s)")
+
+    def save(self) -> None:
+        """Write rules to disk"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'next_id': self.next_id, 'rules': self.rules}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def add_rule(
+        self,
+        guild_id: int,
+        kind: str,
+        days: int,
+        channel_ids: Optional[List[int]] = None,
+        user_ids: Optional[List[int]] = None,
+        created_by: Optional[int] = None
+    ) -> dict:
+        """
+        Add a rule
+
+        Args:
+            guild_id: Guild the rule belongs to
+            kind: 'users' or 'age'
+            days: For 'age', delete messages older than this; for 'users', initial lookback
+            channel_ids: Channels to apply to (empty/None = all channels)
+            user_ids: Target users (required for 'users')
+            created_by: ID of the member who created the rule
+
+        Returns:
+            The new rule
+        """
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Loại rule không hợp lệ: {kind}")
+        if kind == 'users' and not user_ids:
+            raise ValueError("Rule 'users' cần ít nhất một user")
+
+        rule = {
+            'id': self.next_id,
+            'guild_id': guild_id,
+            'kind': kind,
+            'days': days,
+            'channel_ids': list(channel_ids or []),
+            'user_ids': list(user_ids or []),
+            'created_by': created_by,
+            'created_at': time.time(),
+            'last_run': None,
+            # channel_id (str) -> snowflake đã xử lý xong tới đó
+            'hwm': {},
+            # channel_id (str) -> [[message_id, số lần lỗi]] cần xóa lại ở lần chạy sau
+            'retry': {}
+        }
+        self.next_id += 1
+        self.rules.append(rule)
+        self.save()
+        return rule
+
+    def remove_rule(self, guild_id: int, rule_id: int) -> bool:
+        """Remove a rule of a guild, returns False if not found"""
+        for rule in self.rules:
+            if rule['id'] == rule_id and rule['guild_id'] == guild_id:
+                self.rules.remove(rule)
+                self.save()
+                return True
+        return False
+
+    def replace_channel(self, old_channel_id: int, new_channel_id: int) -> None:
+        """Point rules at a channel that replaced another one (channel reset)"""
+        changed = False
+        for rule in self.rules:
+            if old_channel_id in rule['channel_ids']:
+                rule['channel_ids'] = [new_channel_id if cid == old_channel_id else cid for cid in rule['channel_ids']]
+                changed = True
+            if rule['hwm'].pop(str(old_channel_id), None) is not None:
+                changed = True
+            if rule.get('retry', {}).pop(str(old_channel_id), None) is not None:
+                changed = True
+        if changed:
+            self.save()
+
+    def get_rule(self, guild_id: int, rule_id: int) -> Optional[dict]:
+        for rule in self.rules:
+            if rule['id'] == rule_id and rule['guild_id'] == guild_id:
+                return rule
+        return None
+
+    def rules_for_guild(self, guild_id: int) -> List[dict]:
+        return [rule for rule in self.rules if rule['guild_id'] == guild_id]
+
+def describe_rule(rule: dict) -> str:
+    """Human readable one-line description of a rule"""
+    scope = ", ".join(f"<#{cid}>" for cid in rule['channel_ids']) or "tất cả kênh"
+    if rule['kind'] == 'users':
+        users = ", ".join(f"<@{uid}>" for uid in rule['user_ids'])
+        return f"#{rule['id']} • Xóa liên tục tin nhắn của {users} • {scope}"
+    return f"#{rule['id']} • Xóa tin nhắn cũ hơn {rule['days']} ngày • {scope}"
+
+def _rule_channels(guild: discord.Guild, rule: dict) -> List[Union[discord.TextChannel, discord.VoiceChannel]]:
+    """Channels a rule applies to that the bot can clean"""
+    if rule['channel_ids']:
+        candidates = [guild.get_channel(cid) for cid in rule['channel_ids']]
+    else:
+        candidates = guild.channels
+    channels = []
+    for channel in candidates:
+        if not isinstance(channel, (discord.TextChannel, discord.VoiceChannel)):
+            continue
+        permissions = channel.permissions_for(guild.me)
+        if permissions.read_message_history and permissions.manage_messages:
+            channels.append(channel)
+    return channels
+
+async def run_rule(guild: discord.Guild, rule: dict, store: RetentionStore) -> Optional[dict]:
+    """
+    Execute one pass of a rule
+
+    Each channel is paged from its high-water mark only, so a pass costs requests
+    proportional to the traffic since the previous pass. The mark advances once
+    the channel was fully paged; messages whose delete failed are kept in the
+    rule and retried on the next passes (up to RETRY_LIMIT times). Messages older
+    than 14 days go to the slow lane when it is enabled instead of being deleted
+    one by one during the pass.
+
+    Args:
+        guild: Guild of the rule
+        rule: Rule dict (its hwm is updated in place)
+        store: Store to persist the updated rule
+
+    Returns:
+        Dict with deleted, errors, channels, or None if the rule is already running
+    """
+    lock = _rule_locks.setdefault(rule['id'], asyncio.Lock())
+    if lock.locked():
+        logger.info(f"Retention rule #{rule['id']} đang chạy, bỏ qua lần này")
+        return None
+    async with lock:
+        return await _run_rule(guild, rule, store)
+
+async def _run_rule(guild: discord.Guild, rule: dict, store: RetentionStore) -> dict:
+    now = time.time()
+    total_deleted = 0
+    total_errors = 0
+    channels = _rule_channels(guild, rule)
+
+    if rule['kind'] == 'users':
+        user_ids = set(rule['user_ids'])
+        match = lambda record: record.author_id in user_ids
+        # Xử lý tới hiện tại; lần đầu nhìn lại `days` ngày
+        upper = now
+        default_start = now - rule['days'] * DAY_SECONDS
+    else:
+        # Không xóa tin nhắn đã ghim khi dọn theo tuổi
+        match = lambda record: not record.pinned
+        # Chỉ những tin nhắn cũ hơn N ngày; lần đầu quét từ đầu kênh
+        upper = now - rule['days'] * DAY_SECONDS
+        default_start = DISCORD_EPOCH / 1000
+
+    retries = rule.setdefault('retry', {})
+    defer_old = config.SLOW_LANE_ENABLED
+    deferred = {}
+
+    with profile_job(f"retention-{guild.id}-{rule['id']}"):
+        for channel in channels:
+            key = str(channel.id)
+            attempts = {message_id: count for message_id, count in retries.pop(key, [])}
+            failed_ids = []
+            # Tin nhắn job khác đang xóa: giữ lại (không tính lần lỗi) cho tới khi biết chắc đã bị xóa
+            busy = [message_id for message_id in attempts if deletion_registry.is_in_flight(message_id)]
+            if attempts:
+                deleted, errors = await delete_old_messages(channel, list(attempts), failed_ids)
+                total_deleted += deleted
+                total_errors += errors
+
+            hwm = rule['hwm'].get(key)
+            # Lùi 1ms để không bỏ sót tin nhắn cùng millisecond với mốc
+            start = snowflake_timestamp(hwm) - 0.001 if hwm else default_start
+            if start < upper:
+                result = await purge_channel(
+                    channel, match, [(start, None if rule['kind'] == 'users' else upper)], defer_old=defer_old
+                )
+                total_deleted += result['deleted_count']
+                total_errors += result['errors']
+                failed_ids.extend(result['failed_ids'])
+                if result['old_ids']:
+                    deferred[channel.id] = result['old_ids']
+                if result['success']:
+                    rule['hwm'][key] = timestamp_to_snowflake(upper)
+                else:
+                    logger.warning(f"Retention rule #{rule['id']}: giữ nguyên mốc của #{channel.name} do lỗi khi quét")
+
+            # Tin nhắn xóa lỗi được thử lại ở lần sau, mốc vẫn được dời lên
+            kept = [[message_id, attempts.get(message_id, 0) + 1] for message_id in failed_ids]
+            dropped = sum(1 for _, count in kept if count >= RETRY_LIMIT)
+            if dropped:
+                logger.warning(f"Retention rule #{rule['id']}: bỏ {dropped} tin nhắn xóa lỗi {RETRY_LIMIT} lần ở #{channel.name}")
+            kept = [entry for entry in kept if entry[1] < RETRY_LIMIT]
+            kept.extend(
+                [message_id, attempts[message_id]] for message_id in busy
+                if not deletion_registry.is_deleted(message_id) and message_id not in failed_ids
+            )
+            if kept:
+                retries[key] = kept
+
+    if deferred:
+        # Tin nhắn cũ hơn 14 ngày (thường là lần chạy đầu của rule age) xóa dần ở slow lane
+        slow_lane.enqueue(guild.id, deferred, label=f"retention rule #{rule['id']}")
+
+    rule['last_run'] = now
+    store.save()
+
+    if total_deleted or total_errors:
+        logger.info(f"Retention rule #{rule['id']} ({guild.name}): {total_deleted} tin nhắn đã xóa, {total_errors} lỗi")
+    return {'deleted': total_deleted, 'errors': total_errors, 'channels': len(channels)}
+
+# Global store instance (loaded by the retention cog)
+retention_store = RetentionStore(os.path.join(config.DATA_DIR, 'retention.json'))
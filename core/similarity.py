@@ -0,0 +1,169 @@
+"""
+Similarity matching - MinHash + LSH để tìm tin nhắn spam gần giống mẫu, không phân biệt người gửi
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from core.history_cache import ContentRecord
+
+_MASK = (1 << 64) - 1
+_EMPTY = _MASK + 1
+
+# Giới hạn memo nội dung -> kết quả (spam copy-paste lặp lại y hệt rất nhiều)
+_MEMO_MAX = 50000
+
+def normalize(text: str) -> str:
+    """Casefold and collapse whitespace, so trivial variations don't change shingles"""
+    return ' '.join(text.casefold().split())
+
+class MinHasher:
+    """
+    One-permutation MinHash over character shingles
+
+    Each shingle is hashed once; the low bits pick one of num_perm bins and the
+    rest is the value kept as that bin's minimum, so a signature costs one hash
+    per shingle instead of num_perm. Empty bins (short texts) borrow the next
+    filled bin's value (rotation densification).
+
+    Shingles use Python's string hash, which is salted per process: signatures
+    are only comparable within the process that computed them.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5):
+        if num_perm <= 0 or num_perm & (num_perm - 1):
+            raise ValueError("num_perm must be a power of two")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._bits = num_perm.bit_length() - 1
+        # Giá trị mượn từ bin cách d bước được cộng d * _rotation để khác giá trị thật
+        self._rotation = 1 << (64 - self._bits)
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """Signature of a text, None if it is empty after normalization"""
+        text = normalize(text)
+        if not text:
+            return None
+        k = self.shingle_size
+        if len(text) <= k:
+            hashes = {hash(text) & _MASK}
+        else:
+            hashes = {hash(text[i:i + k]) & _MASK for i in range(len(text) - k + 1)}
+
+        n = self.num_perm
+        bin_mask = n - 1
+        bits = self._bits
+        mins = [_EMPTY] * n
+        for h in hashes:
+            b = h & bin_mask
+            v = h >> bits
+            if v < mins[b]:
+                mins[b] = v
+
+        if len(hashes) < n * 4 and _EMPTY in mins:
+            filled = list(mins)
+            for i in range(n):
+                if filled[i] != _EMPTY:
+                    continue
+                for distance in range(1, n):
+                    value = filled[(i + distance) & bin_mask]
+                    if value != _EMPTY:
+                        mins[i] = value + distance * self._rotation
+                        break
+        return tuple(mins)
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the shingle sets"""
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures: keys sharing any whole band are candidates"""
+
+    def __init__(self, num_perm: int, bands: int):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def add(self, key: int, signature: Tuple[int, ...]) -> None:
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature: Tuple[int, ...]) -> Set[int]:
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            keys = self._buckets.get(band_key)
+            if keys:
+                candidates.update(keys)
+        return candidates
+
+class SimilarityMatcher:
+    """
+    Match predicate flagging messages that are near-duplicates of example texts
+
+    Candidates come from the LSH index and are confirmed by the estimated
+    similarity against the example. Pinned and empty messages never match.
+    """
+
+    def __init__(
+        self,
+        examples: List[str],
+        threshold: float,
+        num_perm: int = 64,
+        bands: int = 32,
+        min_length: int = 10
+    ):
+        """
+        Args:
+            examples: Example spam texts
+            threshold: Minimum estimated Jaccard similarity (0-1) to count as a match
+            num_perm: Signature length (power of two)
+            bands: LSH bands (num_perm / bands rows per band)
+            min_length: Examples shorter than this (normalized) are rejected, they would match too broadly
+        """
+        self.hasher = MinHasher(num_perm)
+        self.index = LSHIndex(num_perm, bands)
+        self.threshold = threshold
+        self.signatures: List[Tuple[int, ...]] = []
+        for text in examples:
+            if len(normalize(text)) < min_length:
+                raise ValueError(f"Tin nhắn mẫu quá ngắn (cần ít nhất {min_length} ký tự)")
+            signature = self.hasher.signature(text)
+            self.index.add(len(self.signatures), signature)
+            self.signatures.append(signature)
+        if not self.signatures:
+            raise ValueError("Cần ít nhất một tin nhắn mẫu")
+        self._memo: Dict[str, bool] = {}
+        self.checked = 0
+        self.matched = 0
+
+    def best_similarity(self, text: str) -> float:
+        """Highest estimated similarity of text to any example among LSH candidates (0 if none)"""
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return 0.0
+        return max(
+            (MinHasher.similarity(signature, self.signatures[key]) for key in self.index.query(signature)),
+            default=0.0
+        )
+
+    def __call__(self, record: ContentRecord) -> bool:
+        if record.pinned or not record.content:
+            return False
+        self.checked += 1
+        is_match = self._memo.get(record.content)
+        if is_match is None:
+            is_match = self.best_similarity(record.content) >= self.threshold
+            if len(self._memo) >= _MEMO_MAX:
+                self._memo.clear()
+            self._memo[record.content] = is_match
+        if is_match:
+            self.matched += 1
+        return is_match
+
+    def stats(self) -> dict:
+        return {'examples': len(self.signatures), 'checked': self.checked, 'matched': self.matched}
@@ -0,0 +1,280 @@
+"""
+Slow lane - hàng chờ xóa tin nhắn cũ hơn 14 ngày chạy nền, có giới hạn tốc độ
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import discord
+from utils.logger import logger
+from utils.config import config
+from core.message_cleaner import delete_old_messages
+
+class SlowLane:
+    """
+    Persisted queue of old message IDs drained in the background
+
+    Clear jobs finish their bulk deletes and hand the one-by-one part over as a
+    batch. Batches are drained oldest first at a fixed rate, optionally only in
+    off-peak hours, and each batch announces its own completion.
+
+    Changes only mark the queue dirty; the drain loop writes it at most every
+    save_interval seconds (and when the queue empties), off the event loop.
+    """
+
+    def __init__(self, path: str, rate: float, hours: Optional[Tuple[int, int]] = None, chunk_size: int = 20,
+                 save_interval: float = 30):
+        self.path = path
+        # Số tin nhắn xóa mỗi giây (tổng, mọi token)
+        self.rate = rate
+        # (start_hour, end_hour) giờ địa phương, None = chạy cả ngày
+        self.hours = hours
+        self.chunk_size = chunk_size
+        self.save_interval = save_interval
+        self.batches: List[dict] = []
+        # Mọi message ID đang chờ (để enqueue bỏ ID trùng mà không duyệt lại cả hàng chờ)
+        self.queued_ids: Set[int] = set()
+        self.next_id = 1
+        self._wakeup = asyncio.Event()
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def load(self) -> None:
+        """Load pending batches from disk (missing file means an empty queue)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Không thể đọc slow lane: {e}")
+            return
+        self.batches = data.get('batches', [])
+        self.next_id = data.get('next_id', len(self.batches) + 1)
+        self.queued_ids = {
+            message_id
+            for batch in self.batches
+            for ids in batch['channels'].values()
+            for message_id in ids
+        }
+        if self.batches:
+            logger.info(f"Slow lane: {self.pending_count()} tin nhắn cũ đang chờ trong {len(self.batches)} batch")
+
+    def save(self) -> None:
+        """Write the queue to disk"""
+        self._write(self._snapshot())
+        self._dirty = False
+
+    def _snapshot(self) -> dict:
+        """Copy of the queue (built on the loop, the drain keeps mutating the ID lists)"""
+        return {
+            'next_id': self.next_id,
+            'batches': [
+                dict(batch, channels={key: list(ids) for key, ids in batch['channels'].items()})
+                for batch in self.batches
+            ]
+        }
+
+    def _write(self, data: dict) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    async def _save_if_due(self) -> None:
+        """Write pending changes in a thread, at most every save_interval (always once the queue is empty)"""
+        if not self._dirty:
+            return
+        if self.batches and time.monotonic() - self._saved_at < self.save_interval:
+            return
+        data = self._snapshot()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        try:
+            # Hàng chờ có thể lên tới vài MB JSON: ghi ở thread riêng để không chặn gateway loop
+            await asyncio.to_thread(self._write, data)
+        except OSError as e:
+            self._dirty = True
+            logger.warning(f"Không thể lưu slow lane: {e}")
+
+    def pending_count(self) -> int:
+        return sum(len(ids) for batch in self.batches for ids in batch['channels'].values())
+
+    def enqueue(
+        self,
+        guild_id: int,
+        deferred: Dict[int, List[int]],
+        label: str,
+        notify_channel_id: Optional[int] = None,
+        requested_by: Optional[int] = None
+    ) -> Optional[dict]:
+        """
+        Queue the deferred messages of a clear job
+
+        Args:
+            guild_id: Guild of the job
+            deferred: channel_id -> message IDs (result['deferred'] of a clear)
+            label: Short description used in the completion notice
+            notify_channel_id: Channel to announce completion in
+            requested_by: ID of the member who ran the job
+
+        Returns:
+            The new batch, or None if nothing was queued
+        """
+        # Bỏ ID đã nằm trong batch khác (hai job chồng nhau)
+        queued = self.queued_ids
+        channels = {}
+        for channel_id, message_ids in deferred.items():
+            fresh = [message_id for message_id in message_ids if message_id not in queued]
+            if fresh:
+                channels[str(channel_id)] = fresh
+                queued.update(fresh)
+        if not channels:
+            return None
+
+        total = sum(len(ids) for ids in channels.values())
+        batch = {
+            'id': self.next_id,
+            'guild_id': guild_id,
+            'label': label,
+            'notify_channel_id': notify_channel_id,
+            'requested_by': requested_by,
+            'created_at': time.time(),
+            'total': total,
+            'deleted': 0,
+            'errors': 0,
+            'channels': channels
+        }
+        self.next_id += 1
+        self.batches.append(batch)
+        self._dirty = True
+        self._wakeup.set()
+        logger.info(f"Slow lane: batch #{batch['id']} với {total} tin nhắn cũ ({label})")
+        return batch
+
+    def drop_channel(self, channel_id: int) -> None:
+        """Forget queued messages of a channel that no longer exists"""
+        changed = False
+        for batch in list(self.batches):
+            message_ids = batch['channels'].pop(str(channel_id), None)
+            if message_ids is None:
+                continue
+            changed = True
+            self.queued_ids.difference_update(message_ids)
+            # Kênh đã bị xóa cùng toàn bộ tin nhắn
+            batch['deleted'] += len(message_ids)
+            if not batch['channels']:
+                self.batches.remove(batch)
+                logger.info(f"Slow lane: batch #{batch['id']} xong do kênh đã bị xóa")
+        if changed:
+            self._dirty = True
+            self._wakeup.set()
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Whether the current local hour is inside the configured off-peak window"""
+        if self.hours is None:
+            return True
+        hour = (now or datetime.now()).hour
+        start, end = self.hours
+        if start <= end:
+            return start <= hour < end
+        # Khoảng qua nửa đêm, ví dụ 22-6
+        return hour >= start or hour < end
+
+    def eta_seconds(self) -> float:
+        """Rough time to drain the whole queue at the configured rate (ignoring the window)"""
+        return self.pending_count() / self.rate if self.rate > 0 else 0.0
+
+    async def run(self, client: discord.Client) -> None:
+        """Drain the queue forever (run as a background task)"""
+        while True:
+            await self._save_if_due()
+            if not self.batches:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if not self.in_window():
+                await asyncio.sleep(60)
+                continue
+            try:
+                await self._drain_chunk(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lỗi slow lane: {e}")
+                await asyncio.sleep(30)
+
+    async def _drain_chunk(self, client: discord.Client) -> None:
+        """Delete the next chunk of the oldest batch, then sleep to keep the rate"""
+        batch = self.batches[0]
+        channel_key = next(iter(batch['channels']))
+        message_ids = batch['channels'][channel_key]
+        chunk = message_ids[:self.chunk_size]
+
+        started = time.monotonic()
+        channel = await self._resolve_channel(client, int(channel_key))
+        if channel is None:
+            # Kênh bị xóa hoặc bot mất quyền: bỏ cả phần còn lại của kênh
+            logger.warning(f"Slow lane: không truy cập được kênh {channel_key}, bỏ {len(message_ids)} tin nhắn")
+            batch['errors'] += len(message_ids)
+            batch['channels'].pop(channel_key, None)
+            self.queued_ids.difference_update(message_ids)
+        else:
+            deleted, errors = await delete_old_messages(channel, chunk)
+            batch['deleted'] += deleted
+            batch['errors'] += errors
+            del message_ids[:len(chunk)]
+            self.queued_ids.difference_update(chunk)
+            if not message_ids:
+                batch['channels'].pop(channel_key, None)
+        self._dirty = True
+
+        # Batch có thể đã bị drop_channel gỡ trong lúc chờ
+        if not batch['channels'] and batch in self.batches:
+            self.batches.remove(batch)
+            await self._announce(client, batch)
+
+        if channel is not None and self.rate > 0:
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, len(chunk) / self.rate - elapsed))
+
+    async def _resolve_channel(self, client: discord.Client, channel_id: int):
+        channel = client.get_channel(channel_id)
+        if channel is not None:
+            return channel
+        try:
+            return await client.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
+    async def _announce(self, client: discord.Client, batch: dict) -> None:
+        """Report a finished batch in its notify channel"""
+        elapsed = time.time() - batch['created_at']
+        logger.info(
+            f"Slow lane: batch #{batch['id']} xong - {batch['deleted']}/{batch['total']} tin nhắn đã xóa, "
+            f"{batch['errors']} lỗi ({elapsed / 60:.1f} phút)"
+        )
+        if not batch['notify_channel_id']:
+            return
+        channel = client.get_channel(batch['notify_channel_id'])
+        if channel is None:
+            return
+        mention = f"<@{batch['requested_by']}> " if batch['requested_by'] else ""
+        try:
+            await channel.send(
+                f"{mention}✅ Đã xóa xong tin nhắn cũ của {batch['label']}: "
+                f"`{batch['deleted']}`/`{batch['total']}` tin nhắn, `{batch['errors']}` lỗi.",
+                allowed_mentions=discord.AllowedMentions(users=True)
+            )
+        except discord.HTTPException as e:
+            logger.warning(f"Slow lane: không gửi được thông báo hoàn thành: {e}")
+
+# Global queue instance (loaded and drained by the bot)
+slow_lane = SlowLane(
+    os.path.join(config.DATA_DIR, 'slow_lane.json'),
+    rate=config.SLOW_LANE_RATE,
+    hours=config.SLOW_LANE_HOURS
+)
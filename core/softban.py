@@ -0,0 +1,157 @@
+"""
+Softban purge - để Discord xóa tin nhắn của user trên toàn server khi ban (delete_message_seconds)
+"""
+import time
+import discord
+from typing import Optional, Union
+from utils.logger import logger
+from utils.config import config
+from utils.helpers import format_user_display
+from core.history_cache import history_cache
+from core.message_cleaner import clear_user_messages_all_channels
+
+# Discord chỉ xóa tối đa 7 ngày tin nhắn khi ban
+BAN_DELETE_MAX_DAYS = 7
+DAY_SECONDS = 86400
+# Quét chồng lên mốc ban một chút để không sót tin nhắn ở ranh giới
+BOUNDARY_OVERLAP = 60
+
+async def softban_allowed(guild: discord.Guild, user_id: int) -> bool:
+    """
+    Whether policy and permissions allow a softban purge of user_id
+
+    'departed' only softbans users who are no longer members (nothing to kick),
+    'always' also softbans members the bot outranks. Users that are already
+    banned are never touched, since the unban would lift their ban. This is
+    the only ban check of a softban clear: call it right before softban_purge
+    and pass ban_checked=True.
+    """
+    if config.SOFTBAN_MODE == 'off' or guild.me is None:
+        return False
+    if not guild.me.guild_permissions.ban_members or user_id == guild.owner_id:
+        return False
+
+    member = guild.get_member(user_id)
+    if member is None and not guild.chunked:
+        # Không có member cache: hỏi Discord xem user còn trong server không
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        except discord.HTTPException:
+            return False
+
+    if member is not None:
+        return config.SOFTBAN_MODE == 'always' and member.top_role < guild.me.top_role
+
+    if await _fetch_ban_reason(guild, discord.Object(id=user_id)) is not False:
+        logger.info(f"User {user_id} đã bị ban sẵn (hoặc không kiểm tra được), không dùng softban")
+        return False
+    return True
+
+async def _fetch_ban_reason(guild: discord.Guild, target: discord.abc.Snowflake):
+    """Reason of the user's current ban, False if not banned, None if it could not be checked"""
+    try:
+        entry = await guild.fetch_ban(target)
+    except discord.NotFound:
+        return False
+    except discord.HTTPException:
+        return None
+    return entry.reason or ''
+
+async def softban_purge(
+    guild: discord.Guild,
+    user_id: int,
+    days: int,
+    requester: discord.Member,
+    ban_checked: bool = False
+) -> Optional[float]:
+    """
+    Ban with a message deletion window, then unban (unless SOFTBAN_UNBAN is off)
+
+    Args:
+        guild: Guild to purge
+        user_id: Target user ID
+        days: Requested window (capped at 7 days)
+        requester: Member who requested the clear
+        ban_checked: softban_allowed just confirmed the user is not banned
+
+    Returns:
+        Unix timestamp from which Discord deleted the messages, or None if the ban failed
+    """
+    window_days = min(days, BAN_DELETE_MAX_DAYS)
+    reason = f"SuperClearChat: xóa tin nhắn {window_days} ngày, yêu cầu bởi {format_user_display(requester)}"
+    target = discord.Object(id=user_id)
+
+    # Chỉ kiểm tra một lần ngay trước khi ban (softban_allowed đã kiểm tra thì bỏ qua)
+    if not ban_checked and await _fetch_ban_reason(guild, target) is not False:
+        logger.info(f"User {user_id} đã bị ban (hoặc không kiểm tra được), không dùng softban")
+        return None
+
+    banned_at = time.time()
+    try:
+        await guild.ban(target, delete_message_seconds=window_days * DAY_SECONDS, reason=reason)
+    except discord.HTTPException as e:
+        logger.warning(f"Softban user {user_id} thất bại, quét bình thường: {e}")
+        return None
+    logger.info(f"Đã ban user {user_id} kèm xóa tin nhắn {window_days} ngày")
+
+    if config.SOFTBAN_UNBAN:
+        # User chưa bị ban ngay trước lệnh ban này, nên lệnh ban đang có là của bot
+        try:
+            await guild.unban(target, reason=reason)
+        except discord.HTTPException as e:
+            logger.error(f"Không thể unban user {user_id} sau softban: {e}")
+
+    # Tin nhắn bị xóa phía server, cache lịch sử của server không còn đúng
+    for channel in guild.channels:
+        history_cache.invalidate_channel(channel.id)
+    return banned_at - window_days * DAY_SECONDS
+
+async def clear_user_messages_softban(
+    guild: discord.Guild,
+    user: Union[discord.Member, discord.User, int],
+    days: int,
+    requester: discord.Member,
+    defer_old: bool = False,
+    progress: Optional[dict] = None,
+    ban_checked: bool = False
+) -> dict:
+    """
+    Guild-wide clear using a softban for the last 7 days
+
+    Only the part of the window older than 7 days is swept channel by channel.
+    Falls back to a full clear_user_messages_all_channels if the ban fails.
+    Takes the same arguments and returns the same result as
+    clear_user_messages_all_channels, plus 'softban_days' (and ban_checked,
+    see softban_purge).
+    """
+    user_id = user if isinstance(user, int) else user.id
+    purged_from = await softban_purge(guild, user_id, days, requester, ban_checked=ban_checked)
+    if purged_from is None:
+        return await clear_user_messages_all_channels(
+            guild, user, days, requester, defer_old=defer_old, progress=progress
+        )
+
+    softban_days = min(days, BAN_DELETE_MAX_DAYS)
+    if days > BAN_DELETE_MAX_DAYS:
+        result = await clear_user_messages_all_channels(
+            guild, user, days, requester, defer_old=defer_old, progress=progress,
+            until=purged_from + BOUNDARY_OVERLAP
+        )
+    else:
+        result = {
+            'success': True,
+            'total_deleted': 0,
+            'total_errors': 0,
+            'channels_processed': 0,
+            'channels_skipped': 0,
+            'channels_with_messages': [],
+            'deferred': {},
+            'deferred_count': 0,
+            'user': user,
+            'days': days,
+            'guild': guild
+        }
+    result['softban_days'] = softban_days
+    return result
@@ -0,0 +1,205 @@
+"""
+User prefix index - gợi ý user cho autocomplete của slash command, không gọi HTTP
+"""
+import bisect
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import discord
+from utils.config import config
+
+# Discord giới hạn 25 gợi ý, tên gợi ý tối đa 100 ký tự
+MAX_CHOICES = 25
+MAX_LABEL_LENGTH = 100
+
+class _GuildIndex:
+    """Sorted (key, user_id) entries of one guild plus per-user metadata"""
+    __slots__ = ('entries', 'keys', 'labels', 'recent', 'departed')
+
+    def __init__(self):
+        # Sắp xếp theo key để tìm prefix bằng bisect
+        self.entries: List[Tuple[str, int]] = []
+        self.keys: Dict[int, Tuple[str, ...]] = {}
+        self.labels: Dict[int, str] = {}
+        # user_id -> last seen, cho người không còn/không có trong member cache (LRU)
+        self.recent: 'OrderedDict[int, float]' = OrderedDict()
+        self.departed: set = set()
+
+def _keys_for(user: discord.abc.User) -> Tuple[str, ...]:
+    names = {str(user.id), user.name.casefold()}
+    global_name = getattr(user, 'global_name', None)
+    if global_name:
+        names.add(global_name.casefold())
+    nick = getattr(user, 'nick', None)
+    if nick:
+        names.add(nick.casefold())
+    return tuple(names)
+
+def _label_for(user: discord.abc.User, note: Optional[str] = None) -> str:
+    label = f"{user.display_name} (@{user.name})"
+    if note:
+        label += f" • {note}"
+    return label[:MAX_LABEL_LENGTH]
+
+class UserIndex:
+    """
+    In-memory prefix index over member names, nicks and IDs of every guild
+
+    Recently departed members and recent message authors that are not in the
+    member cache are kept too (bounded per guild), so a raider who already left
+    can still be picked. Lookups are a bisect plus a short scan.
+    """
+
+    def __init__(self, recent_max: int, enabled: bool = True):
+        self.recent_max = recent_max
+        self.enabled = enabled
+        self._guilds: Dict[int, _GuildIndex] = {}
+
+    def _index(self, guild_id: int) -> _GuildIndex:
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = self._guilds[guild_id] = _GuildIndex()
+        return index
+
+    def _unset(self, index: _GuildIndex, user_id: int) -> None:
+        for key in index.keys.pop(user_id, ()):
+            i = bisect.bisect_left(index.entries, (key, user_id))
+            if i < len(index.entries) and index.entries[i] == (key, user_id):
+                del index.entries[i]
+        index.labels.pop(user_id, None)
+
+    def _set(self, index: _GuildIndex, user_id: int, keys: Tuple[str, ...], label: str) -> None:
+        if index.keys.get(user_id) != keys:
+            self._unset(index, user_id)
+            for key in keys:
+                bisect.insort(index.entries, (key, user_id))
+            index.keys[user_id] = keys
+        index.labels[user_id] = label
+
+    def _touch_recent(self, index: _GuildIndex, user_id: int) -> None:
+        index.recent[user_id] = time.time()
+        index.recent.move_to_end(user_id)
+        while len(index.recent) > self.recent_max:
+            evicted, _ = index.recent.popitem(last=False)
+            index.departed.discard(evicted)
+            self._unset(index, evicted)
+
+    # ----- Cập nhật -----
+
+    def rebuild_guild(self, guild: discord.Guild) -> None:
+        """Index every cached member of a guild (one sort instead of many inserts)"""
+        if not self.enabled:
+            return
+        old = self._guilds.get(guild.id)
+        index = _GuildIndex()
+        entries = []
+        for member in guild.members:
+            keys = _keys_for(member)
+            index.keys[member.id] = keys
+            index.labels[member.id] = _label_for(member)
+            entries.extend((key, member.id) for key in keys)
+        index.entries = sorted(entries)
+        self._guilds[guild.id] = index
+
+        # Giữ lại người đã rời / tác giả gần đây không có trong member cache
+        if old is not None:
+            for user_id in old.recent:
+                if user_id not in index.keys and user_id in old.keys:
+                    self._set(index, user_id, old.keys[user_id], old.labels[user_id])
+                    index.recent[user_id] = old.recent[user_id]
+                    if user_id in old.departed:
+                        index.departed.add(user_id)
+
+    def add_member(self, member: discord.Member) -> None:
+        """A member joined or changed name/nick"""
+        if not self.enabled:
+            return
+        index = self._index(member.guild.id)
+        index.recent.pop(member.id, None)
+        index.departed.discard(member.id)
+        self._set(index, member.id, _keys_for(member), _label_for(member))
+
+    def member_left(self, guild_id: int, user: discord.abc.User) -> None:
+        """Keep a departed member searchable for a while"""
+        if not self.enabled:
+            return
+        index = self._index(guild_id)
+        self._set(index, user.id, _keys_for(user), _label_for(user, "đã rời server"))
+        index.departed.add(user.id)
+        self._touch_recent(index, user.id)
+
+    def user_updated(self, user: discord.abc.User, guild_ids: Iterable[int]) -> None:
+        """Username / global name changed (applies to every guild the user is in)"""
+        if not self.enabled:
+            return
+        for guild_id in guild_ids:
+            index = self._guilds.get(guild_id)
+            if index is not None and user.id in index.keys and user.id not in index.departed:
+                self._set(index, user.id, _keys_for(user), _label_for(user))
+
+    def observe_message(self, message: discord.Message) -> None:
+        """Index authors the member cache does not know (e.g. no members intent)"""
+        if not self.enabled or message.guild is None or message.webhook_id is not None:
+            return
+        index = self._index(message.guild.id)
+        user_id = message.author.id
+        if user_id in index.keys and user_id not in index.recent:
+            # Member đã được index đầy đủ
+            return
+        if user_id not in index.keys:
+            self._set(index, user_id, _keys_for(message.author), _label_for(message.author, "vừa nhắn tin"))
+        self._touch_recent(index, user_id)
+
+    def remove_guild(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+
+    # ----- Tìm kiếm -----
+
+    def search(self, guild_id: int, query: str, limit: int = MAX_CHOICES) -> List[Tuple[str, int]]:
+        """
+        Users whose name, nick, global name or ID starts with query
+
+        Args:
+            guild_id: Guild to search
+            query: Typed text (case-insensitive); empty returns the most recent
+                departed members / authors
+            limit: Maximum number of results
+
+        Returns:
+            List of (label, user_id)
+        """
+        index = self._guilds.get(guild_id)
+        if index is None:
+            return []
+
+        query = query.strip().lstrip('@').casefold()
+        if not query:
+            recent = list(reversed(index.recent))[:limit]
+            return [(index.labels[user_id], user_id) for user_id in recent]
+
+        results = []
+        seen = set()
+        entries = index.entries
+        i = bisect.bisect_left(entries, (query,))
+        while i < len(entries) and len(results) < limit:
+            key, user_id = entries[i]
+            if not key.startswith(query):
+                break
+            if user_id not in seen:
+                seen.add(user_id)
+                results.append((index.labels[user_id], user_id))
+            i += 1
+        return results
+
+    def stats(self) -> dict:
+        return {
+            'guilds': len(self._guilds),
+            'users': sum(len(index.keys) for index in self._guilds.values()),
+            'keys': sum(len(index.entries) for index in self._guilds.values())
+        }
+
+# Global index instance (kept up to date by the bot's member/message events)
+user_index = UserIndex(
+    recent_max=config.USER_INDEX_RECENT_MAX,
+    enabled=config.USER_INDEX_ENABLED
+)
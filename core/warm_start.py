@@ -0,0 +1,213 @@
+"""
+Warm start - lưu các cache ảnh hưởng hiệu năng ra file để nạp lại sau khi restart
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import discord
+from utils.logger import logger
+from utils.config import config
+
+# Tăng khi đổi định dạng snapshot (snapshot định dạng cũ bị bỏ qua)
+SNAPSHOT_VERSION = 3
+
+class WarmStart:
+    """
+    Snapshot of resolved users, channel activity, helper permissions and the
+    command tree hash
+
+    Every user, missing user and permission entry carries the time it was
+    checked and is dropped once older than max_age, on load and on lookup.
+    Permission results are only reused for the same set of helper tokens, and
+    denials learned from a 403 are never saved. The command tree hash lets
+    startup skip the slash command sync when nothing changed.
+    """
+
+    def __init__(self, path: str, max_age: float, max_users: int = 10000):
+        self.path = path
+        self.max_age = max_age
+        self.max_users = max_users
+        # user_id -> (User đã fetch, thời điểm fetch) (cache user của discord.py là weakref và tắt khi không có members intent)
+        self.users: 'OrderedDict[int, Tuple[discord.User, float]]' = OrderedDict()
+        # user_id không tồn tại (fetch_user trả 404) -> thời điểm kiểm tra
+        self.missing_users: Dict[int, float] = {}
+        # channel_id -> last_message_id đã thấy
+        self.channel_activity: Dict[int, int] = {}
+        self.tree_hash: Optional[str] = None
+        self._loaded: dict = {}
+
+    # ----- Users -----
+
+    def get_user(self, client: discord.Client, user_id: int) -> Optional[discord.User]:
+        """A known user without any HTTP call (client cache first, then fetched users)"""
+        user = client.get_user(user_id)
+        if user is not None:
+            return user
+        entry = self.users.get(user_id)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.max_age:
+            del self.users[user_id]
+            return None
+        self.users.move_to_end(user_id)
+        return entry[0]
+
+    def remember_user(self, user: discord.User) -> discord.User:
+        """Keep a fetched user for later lookups and the next snapshot"""
+        self.users[user.id] = (user, time.time())
+        self.users.move_to_end(user.id)
+        self.missing_users.pop(user.id, None)
+        while len(self.users) > self.max_users:
+            self.users.popitem(last=False)
+        return user
+
+    def remember_missing(self, user_id: int) -> None:
+        self.missing_users[user_id] = time.time()
+
+    def is_missing(self, user_id: int) -> bool:
+        """Whether fetch_user recently returned 404 for this ID"""
+        checked_at = self.missing_users.get(user_id)
+        if checked_at is None:
+            return False
+        if time.time() - checked_at > self.max_age:
+            del self.missing_users[user_id]
+            return False
+        return True
+
+    # ----- Channel activity -----
+
+    def last_activity(self, channel) -> Optional[int]:
+        """Newest known message ID of a channel (live value or snapshot)"""
+        live = getattr(channel, 'last_message_id', None) or 0
+        known = max(live, self.channel_activity.get(channel.id, 0))
+        return known or None
+
+    # ----- Command tree -----
+
+    @staticmethod
+    def _command_payload(command, tree: discord.app_commands.CommandTree) -> dict:
+        try:
+            return command.to_dict(tree)
+        except TypeError:
+            # discord.py < 2.4: to_dict() không nhận tree
+            return command.to_dict()
+
+    @staticmethod
+    def compute_tree_hash(client: discord.Client, tree: discord.app_commands.CommandTree) -> str:
+        payload = {
+            'application_id': client.application_id,
+            'commands': sorted(
+                (WarmStart._command_payload(command, tree) for command in tree.get_commands()),
+                key=lambda command: command['name']
+            )
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    # ----- Lưu / nạp -----
+
+    def save(self, client: discord.Client) -> None:
+        """Write the snapshot to disk"""
+        from core.worker_pool import worker_pool
+
+        for channel in client.get_all_channels():
+            last_message_id = getattr(channel, 'last_message_id', None)
+            if last_message_id:
+                self.channel_activity[channel.id] = max(last_message_id, self.channel_activity.get(channel.id, 0))
+
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'bot_id': client.user.id if client.user else None,
+            'tree_hash': self.tree_hash,
+            'users': [[user._to_minimal_user_json(), checked_at] for user, checked_at in self.users.values()],
+            'missing_users': {str(user_id): checked_at for user_id, checked_at in self.missing_users.items()},
+            'channel_activity': {str(cid): mid for cid, mid in self.channel_activity.items()},
+            'helper_ids': sorted(helper.user_id for helper in worker_pool.helpers),
+            # Chỉ kết quả tính từ quyền; helper bị 403 (worker_pool.denied) không được lưu
+            'permissions': {
+                f"{helper_id}:{channel_id}": [allowed, checked_at]
+                for (helper_id, channel_id), (allowed, checked_at) in worker_pool.permission_cache.items()
+            }
+        }
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def load(self, client: discord.Client) -> None:
+        """
+        Load the snapshot (call in setup_hook, after login)
+
+        The tree hash and channel activity are always reused; users, missing
+        users and permission results only if each was checked within max_age.
+        """
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Không thể đọc warm start snapshot: {e}")
+            return
+
+        if data.get('bot_id') != client.user.id:
+            logger.info("Snapshot của bot khác, bỏ qua warm start")
+            return
+        if data.get('version') != SNAPSHOT_VERSION:
+            logger.info("Snapshot định dạng cũ, bỏ qua warm start")
+            return
+
+        self.tree_hash = data.get('tree_hash')
+        self.channel_activity = {int(cid): mid for cid, mid in data.get('channel_activity', {}).items()}
+
+        now = time.time()
+        age = now - data.get('saved_at', 0)
+        for user_data, checked_at in data.get('users', []):
+            if now - checked_at <= self.max_age:
+                user = discord.User(state=client._connection, data=user_data)
+                self.users[user.id] = (user, checked_at)
+        self.missing_users = {
+            int(user_id): checked_at
+            for user_id, checked_at in data.get('missing_users', {}).items()
+            if now - checked_at <= self.max_age
+        }
+        self._loaded = data
+        logger.info(
+            f"Warm start: {len(self.users)} user, {len(self.channel_activity)} kênh "
+            f"(snapshot {age / 60:.0f} phút trước)"
+        )
+
+    def restore_permissions(self) -> None:
+        """Reuse helper permission results (call after the worker pool has started)"""
+        from core.worker_pool import worker_pool
+
+        helper_ids = sorted(helper.user_id for helper in worker_pool.helpers)
+        if not helper_ids or self._loaded.get('helper_ids') != helper_ids:
+            return
+        now = time.time()
+        for key, (allowed, checked_at) in self._loaded.get('permissions', {}).items():
+            if now - checked_at > self.max_age:
+                continue
+            helper_id, _, channel_id = key.partition(':')
+            worker_pool.permission_cache.setdefault((int(helper_id), int(channel_id)), (allowed, checked_at))
+        logger.info(f"Warm start: {len(worker_pool.permission_cache)} kết quả quyền của helper")
+
+    async def autosave(self, client: discord.Client, interval: float) -> None:
+        """Periodically save the snapshot"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.save(client)
+            except OSError as e:
+                logger.warning(f"Không thể lưu warm start snapshot: {e}")
+
+# Global snapshot instance (loaded in setup_hook, saved periodically and on close)
+warm_start = WarmStart(
+    os.path.join(config.DATA_DIR, 'warm_start.json'),
+    max_age=config.WARM_START_MAX_AGE_HOURS * 3600
+)
@@ -0,0 +1,195 @@
+"""
+Multi-token deletion worker pool - chia việc xóa từng tin nhắn cho nhiều bot token
+"""
+import asyncio
+import time
+import discord
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from utils.logger import logger
+from utils.profiler import get_job_profiler
+
+# Quyền tính từ cache được tính lại sau PERMISSION_TTL (phòng khi bỏ lỡ event đổi role/overwrite)
+PERMISSION_TTL = 3600
+# Helper bị 403 chỉ bị loại khỏi kênh trong DENIED_TTL, sau đó thử lại
+DENIED_TTL = 600
+
+class HelperWorker:
+    """One helper bot token, logged in over HTTP only"""
+
+    def __init__(self, index: int, client: discord.Client):
+        self.index = index
+        self.client = client
+        self.user_id: int = client.user.id
+        self.name = f"helper#{index} ({client.user})"
+
+    async def delete_message(self, channel_id: int, message_id: int) -> None:
+        """Delete a message using this helper's own rate-limit buckets"""
+        await self.client.http.delete_message(channel_id, message_id)
+
+class DeletionWorkerPool:
+    """
+    Pool of helper bot tokens used to parallelize single-message deletes
+
+    The main bot always takes part; helpers are added only for channels where they
+    can delete messages. Each token has its own rate-limit buckets, so old-message
+    deletes scale with the number of usable tokens.
+
+    Permission results expire after PERMISSION_TTL and are dropped earlier when
+    the bot sees a role, overwrite or helper member change. A helper that got
+    403 in a channel is only skipped there for DENIED_TTL.
+    """
+
+    def __init__(self):
+        self.helpers: List[HelperWorker] = []
+        # (helper_user_id, channel_id) -> (True/False, thời điểm kiểm tra), tính từ member cache
+        self.permission_cache: Dict[Tuple[int, int], Tuple[bool, float]] = {}
+        # (helper_user_id, channel_id) -> thời điểm bị 403
+        self.denied: Dict[Tuple[int, int], float] = {}
+
+    async def start(self, tokens: List[str]) -> None:
+        """Log in every helper token (failures are logged and skipped)"""
+        # Import tại đây để tránh import vòng (http_client -> message_cleaner -> worker_pool)
+        from core.http_client import create_http_client
+
+        for index, token in enumerate(tokens, 1):
+            try:
+                client = await create_http_client(token)
+            except Exception as e:
+                logger.error(f"✗ Không thể đăng nhập helper token #{index}: {e}")
+                continue
+            helper = HelperWorker(index, client)
+            self.helpers.append(helper)
+            logger.info(f"✓ Đã đăng nhập {helper.name}")
+
+        if self.helpers:
+            logger.info(f"Worker pool: {len(self.helpers)} helper token(s)")
+
+    async def close(self) -> None:
+        """Close all helper clients"""
+        for helper in self.helpers:
+            await helper.client.close()
+        self.helpers.clear()
+
+    def is_helper(self, user_id: int) -> bool:
+        return any(helper.user_id == user_id for helper in self.helpers)
+
+    def invalidate_channels(self, channel_ids: Iterable[int]) -> None:
+        """Forget permission results of the given channels (overwrites or roles changed)"""
+        channel_ids = set(channel_ids)
+        for cache in (self.permission_cache, self.denied):
+            for key in [key for key in cache if key[1] in channel_ids]:
+                del cache[key]
+
+    def invalidate_helper(self, user_id: int) -> None:
+        """Forget permission results of one helper (its roles changed)"""
+        for cache in (self.permission_cache, self.denied):
+            for key in [key for key in cache if key[0] == user_id]:
+                del cache[key]
+
+    def _can_delete(self, helper: HelperWorker, channel: Union[discord.TextChannel, discord.VoiceChannel]) -> bool:
+        """Check whether a helper may delete messages in a channel"""
+        key = (helper.user_id, channel.id)
+        now = time.time()
+        denied_at = self.denied.get(key)
+        if denied_at is not None:
+            if now - denied_at < DENIED_TTL:
+                return False
+            del self.denied[key]
+        cached = self.permission_cache.get(key)
+        if cached is not None and now - cached[1] < PERMISSION_TTL:
+            return cached[0]
+
+        guild = channel.guild
+        if guild.me is None:
+            # HTTP-only: không có member cache, thử và học từ lỗi 403
+            return True
+
+        member = guild.get_member(helper.user_id)
+        if member is None and not guild.chunked:
+            # Không có member cache (intents thu hẹp): thử và học từ lỗi 403
+            return True
+        if member is None:
+            allowed = False
+        else:
+            permissions = channel.permissions_for(member)
+            allowed = permissions.view_channel and permissions.manage_messages
+        self.permission_cache[key] = (allowed, now)
+        return allowed
+
+    def helpers_for(self, channel: Union[discord.TextChannel, discord.VoiceChannel]) -> List[HelperWorker]:
+        """Return the helpers that can delete in the given channel"""
+        return [helper for helper in self.helpers if self._can_delete(helper, channel)]
+
+    async def delete_individual(
+        self,
+        channel: Union[discord.TextChannel, discord.VoiceChannel],
+        message_ids: List[int]
+    ) -> Tuple[List[int], List[int], int]:
+        """
+        Delete messages one by one, spread across the main bot and eligible helpers
+
+        Workers pull from a shared queue, so faster (less rate-limited) tokens take
+        more of the work. A helper that gets 403 is excluded from the channel and
+        its message goes back to the queue.
+
+        Args:
+            channel: Channel owning the messages (from the main client)
+            message_ids: IDs of messages to delete
+
+        Returns:
+            Tuple of (deleted IDs, IDs that were already gone (404), error_count)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for message_id in message_ids:
+            queue.put_nowait(message_id)
+
+        deleted_ids: List[int] = []
+        missing_ids: List[int] = []
+        counts = {'errors': 0}
+        profiler = get_job_profiler()
+
+        async def run_main():
+            while not queue.empty():
+                message_id = queue.get_nowait()
+                try:
+                    with profiler.phase('single_delete'):
+                        await channel.get_partial_message(message_id).delete()
+                    deleted_ids.append(message_id)
+                except discord.NotFound:
+                    # Đã bị xóa bởi người khác, không tính là lỗi
+                    missing_ids.append(message_id)
+                except discord.HTTPException as e:
+                    logger.warning(f"Không thể xóa tin nhắn {message_id}: {e}")
+                    counts['errors'] += 1
+
+        async def run_helper(helper: HelperWorker):
+            while not queue.empty():
+                message_id = queue.get_nowait()
+                try:
+                    with profiler.phase('single_delete'):
+                        await helper.delete_message(channel.id, message_id)
+                    deleted_ids.append(message_id)
+                except discord.NotFound:
+                    missing_ids.append(message_id)
+                except discord.Forbidden:
+                    logger.warning(f"{helper.name} không có quyền trong #{channel.name}, loại khỏi kênh này")
+                    self.denied[(helper.user_id, channel.id)] = time.time()
+                    queue.put_nowait(message_id)
+                    return
+                except discord.HTTPException as e:
+                    logger.warning(f"{helper.name} không thể xóa tin nhắn {message_id}: {e}")
+                    counts['errors'] += 1
+
+        helpers = self.helpers_for(channel)
+        if helpers:
+            logger.info(f"Xóa {len(message_ids)} tin nhắn cũ với {len(helpers) + 1} token")
+        await asyncio.gather(run_main(), *(run_helper(helper) for helper in helpers))
+
+        # Helper bị loại giữa chừng có thể trả tin nhắn về queue sau khi main đã dừng
+        if not queue.empty():
+            await run_main()
+
+        return deleted_ids, missing_ids, counts['errors']
+
+# Global pool instance (helpers are logged in by the bot/CLI at startup)
+worker_pool = DeletionWorkerPool()
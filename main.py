@@ -13,27 +13,88 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from utils.logger import logger, log_session_start, log_session_end
 from utils.config import config
+from utils.profiler import LoopLagMonitor, create_http_trace
+from utils import runtime
+from core.worker_pool import worker_pool
+from core.author_index import AuthorIndex, author_index
+from core.history_cache import history_cache
+from core.deletion_registry import deletion_registry
+from core.slow_lane import slow_lane
+from core.user_index import UserIndex, user_index
+from core.warm_start import warm_start
+from core.job_queue import job_queue
 
 class SuperClearChatBot(commands.Bot):
     """Custom Bot class with additional functionality"""
     
     def __init__(self):
-        # Set up intents
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.guilds = True
-        intents.members = True
+        # Set up intents (thu hẹp theo tính năng khi dùng profile performance)
+        intents = runtime.build_intents(
+            config.RUNTIME_PROFILE,
+            prefix_commands=config.PREFIX_COMMANDS_ENABLED
+        )
+        
+        options = {}
+        if config.RUNTIME_PROFILE == 'performance':
+            # Clear chỉ dùng raw delete event, không cần message cache hay member chunking
+            options['max_messages'] = None
+            options['chunk_guilds_at_startup'] = False
+            options['member_cache_flags'] = discord.MemberCacheFlags.from_intents(intents)
         
         # Initialize bot
         super().__init__(
             command_prefix=config.BOT_PREFIX,
             intents=intents,
             help_command=None,  # We'll use our custom help command
-            case_insensitive=True
+            case_insensitive=True,
+            http_trace=create_http_trace(),  # None khi PROFILE_JOBS tắt
+            **options
         )
+        
+        self._benchmarked = False
+        self.loop_monitor: LoopLagMonitor = None
+        self._autosave_task: asyncio.Task = None
+        self._slow_lane_task: asyncio.Task = None
+        self._snapshot_task: asyncio.Task = None
     
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
+        # Start event-loop lag monitor
+        if config.LOOP_MONITOR_ENABLED:
+            self.loop_monitor = LoopLagMonitor(
+                threshold_ms=config.LOOP_LAG_THRESHOLD_MS,
+                slow_callback_ms=config.LOOP_SLOW_CALLBACK_MS
+            )
+            self.loop_monitor.start()
+        
+        # Load author index (Bloom filters) and save it periodically
+        if config.AUTHOR_INDEX_ENABLED:
+            author_index.load()
+            self._autosave_task = self.loop.create_task(author_index.autosave(300))
+        
+        # Reload caches saved before the last restart
+        if config.WARM_START_ENABLED:
+            warm_start.load(self)
+        
+        # Log in helper tokens for parallel deletes
+        if config.HELPER_TOKENS:
+            await worker_pool.start(config.HELPER_TOKENS)
+        
+        if config.WARM_START_ENABLED:
+            warm_start.restore_permissions()
+            self._snapshot_task = self.loop.create_task(warm_start.autosave(self, 300))
+        
+        # Resume draining old messages queued before the last restart
+        if config.SLOW_LANE_ENABLED:
+            slow_lane.load()
+            self._slow_lane_task = self.loop.create_task(self._run_slow_lane())
+        
+        # Clear jobs chạy trong worker.py: dọn job cũ và báo số job còn trong hàng chờ
+        if config.JOB_WORKERS_ENABLED:
+            pruned = await asyncio.to_thread(job_queue.prune, 86400)
+            counts = await asyncio.to_thread(job_queue.counts)
+            logger.info(f"Job queue: {counts} (đã dọn {pruned} job cũ)")
+        
         logger.info("Đang tải các module...")
         
         # Load command cogs
@@ -49,21 +110,83 @@ class SuperClearChatBot(commands.Bot):
         except Exception as e:
             logger.error(f"✗ Lỗi tải help_commands: {e}")
         
+        if config.RETENTION_ENABLED:
+            try:
+                await self.load_extension('commands.retention_commands')
+                logger.info("✓ Đã tải module: retention_commands")
+            except Exception as e:
+                logger.error(f"✗ Lỗi tải retention_commands: {e}")
+        
         logger.info("Hoàn thành tải modules")
         
-        # Sync slash commands
+        # Sync slash commands (bỏ qua khi command tree không đổi so với lần sync trước)
+        try:
+            tree_hash = warm_start.compute_tree_hash(self, self.tree) if config.WARM_START_ENABLED else None
+        except Exception as e:
+            logger.warning(f"Không thể tính hash command tree, luôn sync: {e}")
+            tree_hash = None
+        if tree_hash is not None and tree_hash == warm_start.tree_hash:
+            logger.info("✓ Slash commands không thay đổi, bỏ qua sync")
+            return
         try:
             logger.info("Đang sync slash commands...")
             synced = await self.tree.sync()
             logger.info(f"✓ Đã sync {len(synced)} slash command(s)")
+            warm_start.tree_hash = tree_hash
         except Exception as e:
             logger.error(f"✗ Lỗi sync slash commands: {e}")
     
+    async def close(self):
+        """Stop background monitors before closing the connection"""
+        if self.loop_monitor:
+            self.loop_monitor.stop()
+            logger.info(f"Loop lag: {self.loop_monitor.stats()}")
+        if self._autosave_task:
+            self._autosave_task.cancel()
+        if self._slow_lane_task:
+            self._slow_lane_task.cancel()
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+        if config.WARM_START_ENABLED and self.user:
+            try:
+                warm_start.save(self)
+            except OSError as e:
+                logger.warning(f"Không thể lưu warm start snapshot: {e}")
+        job_queue.close()
+        if config.SLOW_LANE_ENABLED:
+            try:
+                slow_lane.save()
+            except OSError as e:
+                logger.warning(f"Không thể lưu slow lane: {e}")
+        if author_index.enabled:
+            try:
+                author_index.save()
+            except OSError as e:
+                logger.warning(f"Không thể lưu author index: {e}")
+        await worker_pool.close()
+        await super().close()
+    
+    async def _run_slow_lane(self):
+        """Drain the slow lane once the channel cache is ready"""
+        await self.wait_until_ready()
+        await slow_lane.run(self)
+    
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f"Bot đã sẵn sàng: {self.user.name} (ID: {self.user.id})")
+        logger.info(f"Runtime: {runtime.describe_runtime(config.RUNTIME_PROFILE)}")
+        
+        # Session gateway mới: các event trong lúc mất kết nối đã bị bỏ lỡ
+        if config.AUTHOR_INDEX_ENABLED:
+            author_index.session_started()
         logger.info(f"Đang phục vụ {len(self.guilds)} server(s)")
         
+        # Index tên member cho autocomplete của /clear
+        if user_index.enabled:
+            for guild in self.guilds:
+                user_index.rebuild_guild(guild)
+            logger.info(f"User index: {user_index.stats()}")
+        
         # Set bot status
         activity = discord.Activity(
             type=discord.ActivityType.watching,
@@ -72,14 +195,111 @@ class SuperClearChatBot(commands.Bot):
         await self.change_presence(activity=activity)
         
         logger.info("Bot đã hoạt động hoàn toàn!")
+        
+        # on_ready chạy lại sau mỗi lần reconnect, chỉ đo một lần
+        if config.EVENT_BENCHMARK_ENABLED and not self._benchmarked:
+            self._benchmarked = True
+            self._log_event_cost()
+    
+    def _log_event_cost(self):
+        """Measure per-event cost of the on_message hot path on this runtime"""
+        # Index tạm để benchmark không ghi author giả vào index thật
+        scratch_index = AuthorIndex('', config.AUTHOR_INDEX_BITS, config.AUTHOR_INDEX_HASHES, config.AUTHOR_INDEX_DAYS)
+        scratch_index.enabled = author_index.enabled
+        scratch_users = UserIndex(config.USER_INDEX_RECENT_MAX, user_index.enabled)
+        
+        def handler(message):
+            scratch_index.observe_message(message)
+            scratch_users.observe_message(message)
+            self._is_command_candidate(message)
+        
+        runtime.log_event_cost(self, handler, config.RUNTIME_PROFILE)
+    
+    async def on_disconnect(self):
+        """Called when the gateway connection drops"""
+        author_index.session_disconnected()
+    
+    async def on_resumed(self):
+        """Called when the gateway session resumes (missed events are replayed)"""
+        author_index.session_resumed()
+    
+    def _is_command_candidate(self, message) -> bool:
+        """Cheap check before building a command context"""
+        return (
+            config.PREFIX_COMMANDS_ENABLED
+            and not message.author.bot
+            and message.content.startswith(config.BOT_PREFIX)
+        )
+    
+    async def on_message(self, message):
+        """Index message authors, then process commands"""
+        author_index.observe_message(message)
+        user_index.observe_message(message)
+        # Phần lớn tin nhắn không phải lệnh: bỏ qua get_context/get_prefix
+        if self._is_command_candidate(message):
+            await self.process_commands(message)
+    
+    async def on_raw_message_delete(self, payload):
+        """Keep the history cache and deletion registry in sync with deletions"""
+        history_cache.discard(payload.channel_id, [payload.message_id])
+        deletion_registry.mark_deleted([payload.message_id])
+    
+    async def on_raw_bulk_message_delete(self, payload):
+        history_cache.discard(payload.channel_id, payload.message_ids)
+        deletion_registry.mark_deleted(payload.message_ids)
+    
+    async def on_guild_channel_pins_update(self, channel, last_pin):
+        """Pinned flags in the cache are stale"""
+        history_cache.invalidate_channel(channel.id)
+    
+    async def on_guild_channel_delete(self, channel):
+        history_cache.invalidate_channel(channel.id)
+    
+    async def on_guild_channel_update(self, before, after):
+        """Permission overwrites changed: the bot may have missed messages"""
+        if before.overwrites != after.overwrites:
+            author_index.invalidate_channel(after.id)
+            worker_pool.invalidate_channels([after.id])
+    
+    async def on_member_join(self, member):
+        user_index.add_member(member)
+    
+    async def on_raw_member_remove(self, payload):
+        """Keep departed members searchable (raw: works without the member cache)"""
+        user_index.member_left(payload.guild_id, payload.user)
+    
+    async def on_user_update(self, before, after):
+        if before.name != after.name or before.global_name != after.global_name:
+            user_index.user_updated(after, [guild.id for guild in after.mutual_guilds])
+    
+    async def on_member_update(self, before, after):
+        """Bot roles changed: visibility of channels may have changed"""
+        if before.nick != after.nick:
+            user_index.add_member(after)
+        if after.id == self.user.id and before.roles != after.roles:
+            for channel in after.guild.channels:
+                author_index.invalidate_channel(channel.id)
+        if before.roles != after.roles and worker_pool.is_helper(after.id):
+            worker_pool.invalidate_helper(after.id)
+    
+    async def on_guild_role_update(self, before, after):
+        """A role changed permissions (of the bot or possibly of a helper)"""
+        if before.permissions == after.permissions:
+            return
+        if after in after.guild.me.roles:
+            for channel in after.guild.channels:
+                author_index.invalidate_channel(channel.id)
+        worker_pool.invalidate_channels(channel.id for channel in after.guild.channels)
     
     async def on_guild_join(self, guild):
         """Called when bot joins a guild"""
         logger.info(f"Đã tham gia server mới: {guild.name} (ID: {guild.id}, Members: {guild.member_count})")
+        user_index.rebuild_guild(guild)
     
     async def on_guild_remove(self, guild):
         """Called when bot leaves a guild"""
         logger.info(f"Đã rời khỏi server: {guild.name} (ID: {guild.id})")
+        user_index.remove_guild(guild.id)
     
     async def on_command_error(self, ctx, error):
         """Global error handler"""
@@ -137,8 +357,8 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        # Run the bot
-        asyncio.run(main())
+        # Run the bot (uvloop khi RUNTIME_PROFILE=performance và đã cài)
+        runtime.run(main(), config.RUNTIME_PROFILE)
     except KeyboardInterrupt:
         logger.info("Bot đã được dừng bởi người dùng")
         log_session_end()
@@ -2,7 +2,7 @@
 Configuration handler for the bot
 """
 import os
-from typing import Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 from utils.logger import logger
 
@@ -17,6 +17,16 @@ class Config:
         self.DISCORD_TOKEN: Optional[str] = os.getenv('DISCORD_TOKEN')
         self.BOT_PREFIX: str = os.getenv('BOT_PREFIX', '!')
         
+        # Helper bot tokens (comma-separated) used to parallelize single-message deletes
+        self.HELPER_TOKENS: List[str] = [
+            token.strip() for token in os.getenv('HELPER_TOKENS', '').split(',') if token.strip()
+        ]
+        
+        # Gateway runtime: 'default' or 'performance' (uvloop, narrowed intents, no message cache)
+        self.RUNTIME_PROFILE: str = os.getenv('RUNTIME_PROFILE', 'default').lower()
+        self.PREFIX_COMMANDS_ENABLED: bool = os.getenv('PREFIX_COMMANDS_ENABLED', 'true').lower() == 'true'
+        self.EVENT_BENCHMARK_ENABLED: bool = os.getenv('EVENT_BENCHMARK_ENABLED', 'true').lower() == 'true'
+        
         # Limits configuration
         self.MAX_DAYS_LIMIT: int = int(os.getenv('MAX_DAYS_LIMIT', '14'))
         self.MIN_DAYS_LIMIT: int = int(os.getenv('MIN_DAYS_LIMIT', '1'))
@@ -25,12 +35,90 @@ class Config:
         self.LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
         self.LOG_TO_FILE: bool = os.getenv('LOG_TO_FILE', 'true').lower() == 'true'
         
+        # Local state directory (author index, queues, snapshots...)
+        self.DATA_DIR: str = os.getenv('DATA_DIR', 'data')
+        
+        # Author index (per-channel Bloom filters used to skip channels during scope=all)
+        self.AUTHOR_INDEX_ENABLED: bool = os.getenv('AUTHOR_INDEX_ENABLED', 'true').lower() == 'true'
+        self.AUTHOR_INDEX_BITS: int = int(os.getenv('AUTHOR_INDEX_BITS', '2048'))
+        self.AUTHOR_INDEX_HASHES: int = int(os.getenv('AUTHOR_INDEX_HASHES', '4'))
+        self.AUTHOR_INDEX_DAYS: int = int(os.getenv('AUTHOR_INDEX_DAYS', str(self.MAX_DAYS_LIMIT + 1)))
+        
+        # History page cache shared across jobs
+        self.HISTORY_CACHE_ENABLED: bool = os.getenv('HISTORY_CACHE_ENABLED', 'true').lower() == 'true'
+        self.HISTORY_CACHE_TTL: float = float(os.getenv('HISTORY_CACHE_TTL', '300'))
+        self.HISTORY_CACHE_MAX_RECORDS: int = int(os.getenv('HISTORY_CACHE_MAX_RECORDS', '500000'))
+        
+        # Intra-channel parallel scanning (snowflake range partitions)
+        self.SCAN_PARTITIONS: int = int(os.getenv('SCAN_PARTITIONS', '4'))
+        self.SCAN_PARTITION_MIN_HOURS: float = float(os.getenv('SCAN_PARTITION_MIN_HOURS', '6'))
+        
+        # Prefix index of member names for /clear user autocomplete
+        self.USER_INDEX_ENABLED: bool = os.getenv('USER_INDEX_ENABLED', 'true').lower() == 'true'
+        self.USER_INDEX_RECENT_MAX: int = int(os.getenv('USER_INDEX_RECENT_MAX', '5000'))
+        
+        # Registry of in-flight / recently deleted message IDs (dedupes overlapping jobs)
+        self.DELETION_REGISTRY_TTL: float = float(os.getenv('DELETION_REGISTRY_TTL', '3600'))
+        self.DELETION_REGISTRY_MAX_ENTRIES: int = int(os.getenv('DELETION_REGISTRY_MAX_ENTRIES', '200000'))
+        
+        # Slow lane: messages older than 14 days are deleted in the background after the bulk part
+        self.SLOW_LANE_ENABLED: bool = os.getenv('SLOW_LANE_ENABLED', 'true').lower() == 'true'
+        self.SLOW_LANE_RATE: float = float(os.getenv('SLOW_LANE_RATE', '1'))
+        self.SLOW_LANE_HOURS: Optional[Tuple[int, int]] = self._parse_hours(os.getenv('SLOW_LANE_HOURS', ''))
+        
+        # Softban purge for 'all' clears (opt-in): 'off', 'departed' (only users no longer in the server) or 'always'
+        self.SOFTBAN_MODE: str = os.getenv('SOFTBAN_MODE', 'off').lower()
+        self.SOFTBAN_UNBAN: bool = os.getenv('SOFTBAN_UNBAN', 'true').lower() == 'true'
+        
+        # Near-duplicate spam sweep (MinHash signatures + LSH bands)
+        self.SIMILARITY_THRESHOLD: float = float(os.getenv('SIMILARITY_THRESHOLD', '0.6'))
+        self.SIMILARITY_NUM_PERM: int = int(os.getenv('SIMILARITY_NUM_PERM', '64'))
+        self.SIMILARITY_BANDS: int = int(os.getenv('SIMILARITY_BANDS', '32'))
+        
+        # Worker processes: the bot only enqueues clear jobs, worker.py processes run them
+        self.JOB_WORKERS_ENABLED: bool = os.getenv('JOB_WORKERS_ENABLED', 'false').lower() == 'true'
+        self.JOB_QUEUE_LEASE_SECONDS: float = float(os.getenv('JOB_QUEUE_LEASE_SECONDS', '60'))
+        self.JOB_QUEUE_POLL_SECONDS: float = float(os.getenv('JOB_QUEUE_POLL_SECONDS', '1'))
+        # Job chưa worker nào nhận sau chừng này giây (và không worker nào đang chạy) thì bot tự chạy
+        self.JOB_QUEUE_CLAIM_TIMEOUT: float = float(os.getenv('JOB_QUEUE_CLAIM_TIMEOUT', '30'))
+        
+        # Warm start snapshot (users, channel activity, helper permissions, command tree hash)
+        self.WARM_START_ENABLED: bool = os.getenv('WARM_START_ENABLED', 'true').lower() == 'true'
+        self.WARM_START_MAX_AGE_HOURS: float = float(os.getenv('WARM_START_MAX_AGE_HOURS', '24'))
+        
+        # Retention policies (background scheduler)
+        self.RETENTION_ENABLED: bool = os.getenv('RETENTION_ENABLED', 'true').lower() == 'true'
+        self.RETENTION_INTERVAL_MINUTES: float = float(os.getenv('RETENTION_INTERVAL_MINUTES', '60'))
+        
+        # Performance monitoring configuration
+        self.LOOP_MONITOR_ENABLED: bool = os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() == 'true'
+        self.LOOP_LAG_THRESHOLD_MS: float = float(os.getenv('LOOP_LAG_THRESHOLD_MS', '250'))
+        self.LOOP_SLOW_CALLBACK_MS: float = float(os.getenv('LOOP_SLOW_CALLBACK_MS', '0'))
+        self.PROFILE_JOBS: bool = os.getenv('PROFILE_JOBS', 'false').lower() == 'true'
+        self.PROFILE_CPROFILE: bool = os.getenv('PROFILE_CPROFILE', 'false').lower() == 'true'
+        self.PROFILE_TRACEMALLOC: bool = os.getenv('PROFILE_TRACEMALLOC', 'false').lower() == 'true'
+        self.PROFILE_DIR: str = os.getenv('PROFILE_DIR', 'profiles')
+        
         # Validate required configuration
         self._validate_config()
         
         # Reconfigure logger with config settings
         self._reconfigure_logger()
     
+    @staticmethod
+    def _parse_hours(value: str) -> Optional[Tuple[int, int]]:
+        """Parse an hour window like '22-6' (empty = whole day)"""
+        if not value.strip():
+            return None
+        start, _, end = value.partition('-')
+        try:
+            hours = (int(start), int(end))
+        except ValueError:
+            raise ValueError(f"Khoảng giờ không hợp lệ: '{value}' (dùng dạng 22-6)")
+        if not all(0 <= hour <= 24 for hour in hours):
+            raise ValueError(f"Khoảng giờ không hợp lệ: '{value}' (giờ từ 0 đến 24)")
+        return hours
+    
     def _reconfigure_logger(self) -> None:
         """Reconfigure logger with config settings"""
         from utils.logger import reconfigure_logger_with_config
@@ -42,6 +130,36 @@ class Config:
             logger.error("DISCORD_TOKEN không được tìm thấy trong file .env")
             raise ValueError("DISCORD_TOKEN is required")
         
+        from utils.runtime import RUNTIME_PROFILES
+        if self.RUNTIME_PROFILE not in RUNTIME_PROFILES:
+            logger.error(f"RUNTIME_PROFILE ({self.RUNTIME_PROFILE}) phải là một trong: {', '.join(RUNTIME_PROFILES)}")
+            raise ValueError("RUNTIME_PROFILE must be 'default' or 'performance'")
+        
+        if self.SOFTBAN_MODE not in ('off', 'departed', 'always'):
+            logger.error(f"SOFTBAN_MODE ({self.SOFTBAN_MODE}) phải là một trong: off, departed, always")
+            raise ValueError("SOFTBAN_MODE must be 'off', 'departed' or 'always'")
+        
+        if self.AUTHOR_INDEX_BITS <= 0 or self.AUTHOR_INDEX_BITS % 8:
+            logger.error(f"AUTHOR_INDEX_BITS ({self.AUTHOR_INDEX_BITS}) phải là bội số dương của 8")
+            raise ValueError("AUTHOR_INDEX_BITS must be a positive multiple of 8")
+        
+        if self.JOB_QUEUE_LEASE_SECONDS <= 0 or self.JOB_QUEUE_POLL_SECONDS <= 0 or self.JOB_QUEUE_CLAIM_TIMEOUT <= 0:
+            logger.error("JOB_QUEUE_LEASE_SECONDS, JOB_QUEUE_POLL_SECONDS và JOB_QUEUE_CLAIM_TIMEOUT phải lớn hơn 0")
+            raise ValueError("JOB_QUEUE_LEASE_SECONDS, JOB_QUEUE_POLL_SECONDS and JOB_QUEUE_CLAIM_TIMEOUT must be positive")
+        
+        if not 0 < self.SIMILARITY_THRESHOLD <= 1:
+            logger.error(f"SIMILARITY_THRESHOLD ({self.SIMILARITY_THRESHOLD}) phải trong khoảng (0, 1]")
+            raise ValueError("SIMILARITY_THRESHOLD must be in (0, 1]")
+        
+        num_perm = self.SIMILARITY_NUM_PERM
+        if num_perm <= 0 or num_perm & (num_perm - 1) or self.SIMILARITY_BANDS <= 0 or num_perm % self.SIMILARITY_BANDS:
+            logger.error("SIMILARITY_NUM_PERM phải là lũy thừa của 2 và chia hết cho SIMILARITY_BANDS")
+            raise ValueError("SIMILARITY_NUM_PERM must be a power of two divisible by SIMILARITY_BANDS")
+        
+        if self.SLOW_LANE_RATE <= 0:
+            logger.error(f"SLOW_LANE_RATE ({self.SLOW_LANE_RATE}) phải lớn hơn 0")
+            raise ValueError("SLOW_LANE_RATE must be positive")
+        
         if self.MAX_DAYS_LIMIT < self.MIN_DAYS_LIMIT:
             logger.error(f"MAX_DAYS_LIMIT ({self.MAX_DAYS_LIMIT}) không thể nhỏ hơn MIN_DAYS_LIMIT ({self.MIN_DAYS_LIMIT})")
             raise ValueError("MAX_DAYS_LIMIT must be greater than or equal to MIN_DAYS_LIMIT")
@@ -51,6 +169,12 @@ class Config:
         logger.info(f"Days Limit: {self.MIN_DAYS_LIMIT} - {self.MAX_DAYS_LIMIT}")
         logger.info(f"Log Level: {self.LOG_LEVEL}")
         logger.info(f"Log to File: {self.LOG_TO_FILE}")
+        logger.info(f"Helper Tokens: {len(self.HELPER_TOKENS)}")
+        logger.info(f"Runtime Profile: {self.RUNTIME_PROFILE} (prefix commands: {self.PREFIX_COMMANDS_ENABLED})")
+        if self.JOB_WORKERS_ENABLED:
+            logger.info("Worker Processes: bật (lệnh clear chạy trong worker.py)")
+        if self.PROFILE_JOBS:
+            logger.info(f"Job Profiling: bật (cProfile={self.PROFILE_CPROFILE}, tracemalloc={self.PROFILE_TRACEMALLOC})")
 
 # Create global config instance
 config = Config()
@@ -3,7 +3,7 @@ Utility functions for the bot
 """
 import re
 import discord
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 from datetime import datetime, timedelta
 from utils.logger import logger
 
@@ -30,6 +30,27 @@ def parse_user_mention(mention_or_id: str) -> Optional[int]:
     
     return None
 
+def parse_message_link(link_or_id: str) -> Optional[Tuple[Optional[int], int]]:
+    """
+    Parse a message link or message ID
+    
+    Args:
+        link_or_id: Message link (https://discord.com/channels/guild/channel/message) or message ID
+    
+    Returns:
+        Tuple of (channel_id or None for a bare ID, message_id), or None if invalid
+    """
+    link_pattern = r'https?://(?:\w+\.)?discord(?:app)?\.com/channels/(?:\d+|@me)/(\d+)/(\d+)'
+    match = re.match(link_pattern, link_or_id.strip('<>'))
+    
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    
+    if link_or_id.isdigit():
+        return None, int(link_or_id)
+    
+    return None
+
 def validate_days(days: str, min_days: int, max_days: int) -> Optional[int]:
     """
     Validate days parameter
@@ -50,6 +71,33 @@ def validate_days(days: str, min_days: int, max_days: int) -> Optional[int]:
     except ValueError:
         return None
 
+# Discord epoch (2015-01-01) in milliseconds, dùng để đọc thời gian từ snowflake
+DISCORD_EPOCH = 1420070400000
+
+def snowflake_timestamp(snowflake: int) -> float:
+    """
+    Get the creation time of a snowflake as a Unix timestamp
+    
+    Args:
+        snowflake: Discord ID (message, channel, user...)
+    
+    Returns:
+        Unix timestamp in seconds
+    """
+    return ((snowflake >> 22) + DISCORD_EPOCH) / 1000
+
+def timestamp_to_snowflake(timestamp: float) -> int:
+    """
+    Get the lowest snowflake created at a Unix timestamp
+    
+    Args:
+        timestamp: Unix timestamp in seconds
+    
+    Returns:
+        Snowflake usable as a history before/after bound
+    """
+    return max(0, int(timestamp * 1000) - DISCORD_EPOCH) << 22
+
 def get_date_cutoff(days: int) -> datetime:
     """
     Get the cutoff date for message deletion
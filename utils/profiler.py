@@ -0,0 +1,300 @@
+"""
+Performance instrumentation - event-loop lag monitor and per-job profiling
+"""
+import asyncio
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+import aiohttp
+from utils.logger import logger
+from utils.config import config
+
+# Các phase được ghi nhận cho mỗi job
+PHASES = ('history_paging', 'matching', 'bulk_delete', 'single_delete', 'http', 'rate_limit_wait')
+
+# Phase có gọi HTTP (dùng để tính thời gian chờ không giải thích được)
+REQUEST_PHASES = ('history_paging', 'bulk_delete', 'single_delete')
+
+_current_profiler: contextvars.ContextVar = contextvars.ContextVar('job_profiler', default=None)
+
+# cProfile chỉ cho phép một profiler active tại một thời điểm
+_cprofile_busy = False
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a sleeping task"""
+
+    def __init__(self, interval: float = 0.5, threshold_ms: float = 250.0, slow_callback_ms: float = 0.0):
+        """
+        Args:
+            interval: Seconds between probes
+            threshold_ms: Lag above which a warning is logged
+            slow_callback_ms: If > 0, enable asyncio debug slow-callback reporting with this threshold
+        """
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.slow_callback_ms = slow_callback_ms
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.slow_probes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start probing on the running loop"""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        if self.slow_callback_ms > 0:
+            # Debug mode của asyncio tự log các callback chạy lâu hơn slow_callback_duration
+            loop.slow_callback_duration = self.slow_callback_ms / 1000
+            loop.set_debug(True)
+            asyncio_logger = logging.getLogger('asyncio')
+            asyncio_logger.setLevel(logging.WARNING)
+            for handler in logger.handlers:
+                if handler not in asyncio_logger.handlers:
+                    asyncio_logger.addHandler(handler)
+            logger.info(f"Bật báo cáo slow callback (> {self.slow_callback_ms:.0f}ms)")
+        self._task = loop.create_task(self._run(), name='loop-lag-monitor')
+        logger.info(f"Loop lag monitor: probe mỗi {self.interval}s, cảnh báo khi lag > {self.threshold * 1000:.0f}ms")
+
+    def stop(self) -> None:
+        """Stop probing"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.slow_probes += 1
+                logger.warning(f"Event loop bị chặn ~{lag * 1000:.0f}ms")
+
+    def stats(self) -> dict:
+        """Return lag statistics in milliseconds"""
+        return {
+            'samples': self.samples,
+            'avg_lag_ms': round(self.total_lag / self.samples * 1000, 2) if self.samples else 0.0,
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+            'slow_probes': self.slow_probes
+        }
+
+class _Phase:
+    """Context manager adding elapsed time to one profiler phase"""
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler: 'JobProfiler', name: str):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._profiler.add(self._name, time.perf_counter() - self._start)
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class NullProfiler:
+    """No-op profiler used when profiling is disabled"""
+    enabled = False
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        pass
+
+    def timed_iter(self, iterator, name: str):
+        return iterator
+
+NULL_PROFILER = NullProfiler()
+
+class JobProfiler:
+    """Accumulate time per phase for one clear job"""
+    enabled = True
+
+    def __init__(self, name: str):
+        self.name = name
+        self.totals = {phase: 0.0 for phase in PHASES}
+        self.counts = {phase: 0 for phase in PHASES}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def phase(self, name: str) -> _Phase:
+        """Time a block of code under the given phase"""
+        return _Phase(self, name)
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        """Add elapsed seconds to a phase"""
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    async def timed_iter(self, iterator, name: str):
+        """Wrap an async iterator, timing each step under the given phase"""
+        iterator = iterator.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.add(name, time.perf_counter() - start, 0)
+                return
+            self.add(name, time.perf_counter() - start)
+            yield item
+
+    def report(self) -> dict:
+        """Return the phase breakdown in seconds"""
+        request_time = sum(self.totals.get(phase, 0.0) for phase in REQUEST_PHASES)
+        return {
+            'job': self.name,
+            'elapsed': round(self.elapsed, 4),
+            'phases': {name: round(seconds, 4) for name, seconds in self.totals.items()},
+            'counts': dict(self.counts),
+            # Thời gian chờ trong các phase gọi API mà không phải network hay 429
+            # (chủ yếu là bucket rate limit chờ trước khi gửi request)
+            'other_wait': round(max(0.0, request_time - self.totals['http'] - self.totals['rate_limit_wait']), 4)
+        }
+
+def get_job_profiler():
+    """Return the profiler of the current job, or a no-op profiler"""
+    return _current_profiler.get() or NULL_PROFILER
+
+def _safe_filename(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name)[:80]
+
+@contextmanager
+def profile_job(name: str):
+    """
+    Profile a job if PROFILE_JOBS is enabled
+
+    Nested calls reuse the outer job's profiler, so a sweep over all channels
+    produces a single report.
+
+    Args:
+        name: Job name used in logs and the report filename
+    """
+    global _cprofile_busy
+
+    current = _current_profiler.get()
+    if current is not None or not config.PROFILE_JOBS:
+        yield current or NULL_PROFILER
+        return
+
+    profiler = JobProfiler(name)
+    token = _current_profiler.set(profiler)
+
+    cprofile = None
+    if config.PROFILE_CPROFILE and not _cprofile_busy:
+        _cprofile_busy = True
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+
+    started_tracemalloc = False
+    if config.PROFILE_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracemalloc = True
+
+    try:
+        yield profiler
+    finally:
+        _current_profiler.reset(token)
+        profiler.elapsed = time.perf_counter() - profiler.started
+        if cprofile is not None:
+            cprofile.disable()
+            _cprofile_busy = False
+        report = profiler.report()
+
+        memory_stats = None
+        if started_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            memory_stats = [str(stat) for stat in snapshot.statistics('lineno')[:25]]
+
+        _write_report(profiler, report, cprofile, memory_stats)
+
+def _write_report(profiler: JobProfiler, report: dict, cprofile, memory_stats) -> None:
+    phases = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in report['phases'].items() if seconds)
+    logger.info(f"Profile '{profiler.name}': {report['elapsed']:.2f}s | {phases} | other_wait={report['other_wait']:.2f}s")
+
+    try:
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(
+            config.PROFILE_DIR,
+            f"{_safe_filename(profiler.name)}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        )
+        if cprofile is not None:
+            cprofile.dump_stats(base + '.prof')
+            report['cprofile'] = base + '.prof'
+        if memory_stats is not None:
+            report['tracemalloc_top'] = memory_stats
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Đã ghi profile: {base}.json")
+    except OSError as e:
+        logger.warning(f"Không thể ghi file profile: {e}")
+
+class _RateLimitLogHandler(logging.Handler):
+    """Add discord.py 429 retry sleeps to the current job profiler"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        profiler = _current_profiler.get()
+        message = str(record.msg)
+        if profiler is None or ('rate limited' not in message and 'rate limit has been hit' not in message):
+            return
+        # retry_after luôn là tham số float cuối cùng của các message này
+        if record.args and isinstance(record.args[-1], float):
+            profiler.add('rate_limit_wait', record.args[-1])
+
+def create_http_trace() -> Optional[aiohttp.TraceConfig]:
+    """
+    Create the aiohttp trace used to attribute network time to jobs
+
+    Also installs the rate-limit log handler. Returns None when profiling is disabled
+    so the HTTP client runs without tracing overhead.
+    """
+    if not config.PROFILE_JOBS:
+        return None
+
+    http_logger = logging.getLogger('discord.http')
+    if not any(isinstance(h, _RateLimitLogHandler) for h in http_logger.handlers):
+        http_logger.addHandler(_RateLimitLogHandler(level=logging.WARNING))
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        profiler = _current_profiler.get()
+        if profiler is not None:
+            profiler.add('http', time.perf_counter() - context.started)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_end)
+    return trace
@@ -0,0 +1,138 @@
+"""
+Runtime profile - event loop, JSON decoder và intents cho gateway hot path
+"""
+import asyncio
+import json
+import time
+import discord
+from typing import Optional
+from utils.logger import logger
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+RUNTIME_PROFILES = ('default', 'performance')
+
+def run(coro, profile: str):
+    """Run the main coroutine, on uvloop when the performance profile asks for it"""
+    if profile == 'performance' and uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+def describe_runtime(profile: str) -> str:
+    """One-line summary of the active loop and JSON backend"""
+    loop = type(asyncio.get_running_loop()).__module__.split('.')[0]
+    # discord.py tự dùng orjson để decode gateway khi đã cài
+    json_backend = 'orjson' if discord.utils.HAS_ORJSON else 'json'
+    return f"profile={profile}, loop={loop}, json={json_backend}"
+
+def build_intents(profile: str, prefix_commands: bool) -> discord.Intents:
+    """
+    Intents the enabled features need
+
+    The default profile keeps the original intents. The performance profile only
+    subscribes to guild structure and guild messages (message content only for
+    prefix commands), so Discord stops sending typing, presence, reaction, voice
+    and member events the bot never uses.
+    """
+    if profile != 'performance':
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.guilds = True
+        intents.members = True
+        return intents
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    # Luôn cần MESSAGE_DELETE/MESSAGE_DELETE_BULK: history cache và deletion registry
+    # dựa vào chúng để biết tin nhắn bị xóa bởi người khác (cùng intent với on_message)
+    intents.guild_messages = True
+    intents.message_content = prefix_commands
+    return intents
+
+def _sample_message_payload(channel, author_id: int) -> str:
+    """A representative MESSAGE_CREATE payload for the given channel"""
+    return json.dumps({
+        'id': str(discord.utils.time_snowflake(discord.utils.utcnow())),
+        'channel_id': str(channel.id),
+        'guild_id': str(channel.guild.id),
+        'author': {'id': str(author_id), 'username': 'benchmark', 'discriminator': '0', 'avatar': None},
+        'member': {'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False},
+        'content': 'just a regular chat message, not a command',
+        'timestamp': '2024-01-01T00:00:00+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0
+    })
+
+def measure_event_cost(bot, handler, iterations: int = 2000) -> Optional[dict]:
+    """
+    Micro-benchmark the per-message gateway cost on this runtime
+
+    Times the three steps every MESSAGE_CREATE goes through: JSON decode,
+    building the Message model, and the synchronous part of on_message for a
+    non-command message.
+
+    Args:
+        bot: Ready bot (its connection state is used to build messages)
+        handler: Callable(message) running the on_message fast path
+        iterations: Number of synthetic events
+
+    Returns:
+        Dict of microseconds per event, or None when there is no text channel
+    """
+    channel = next(
+        (channel for guild in bot.guilds for channel in guild.text_channels),
+        None
+    )
+    if channel is None:
+        return None
+
+    raw = _sample_message_payload(channel, bot.user.id + 1)
+    from_json = discord.utils._from_json
+    state = bot._connection
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = from_json(raw)
+    decoded = time.perf_counter()
+    for _ in range(iterations):
+        message = discord.Message(state=state, channel=channel, data=data)
+    built = time.perf_counter()
+    for _ in range(iterations):
+        handler(message)
+    handled = time.perf_counter()
+
+    per_event = 1_000_000 / iterations
+    result = {
+        'decode_us': round((decoded - start) * per_event, 2),
+        'build_us': round((built - decoded) * per_event, 2),
+        'handler_us': round((handled - built) * per_event, 2)
+    }
+    result['total_us'] = round(result['decode_us'] + result['build_us'] + result['handler_us'], 2)
+    result['events_per_sec'] = int(1_000_000 / result['total_us']) if result['total_us'] else 0
+    return result
+
+def log_event_cost(bot, handler, profile: str) -> None:
+    """Run the micro-benchmark and log the result"""
+    try:
+        result = measure_event_cost(bot, handler)
+    except Exception as e:
+        logger.warning(f"Không thể đo chi phí event: {e}")
+        return
+    if result is None:
+        logger.info("Bỏ qua đo chi phí event: chưa có kênh text nào")
+        return
+    logger.info(
+        f"Chi phí mỗi MESSAGE_CREATE ({describe_runtime(profile)}): "
+        f"decode {result['decode_us']}µs + model {result['build_us']}µs + handler {result['handler_us']}µs "
+        f"= {result['total_us']}µs (~{result['events_per_sec']} event/s/core)"
+    )
@@ -0,0 +1,101 @@
+"""
+Clear worker - chạy job clear từ hàng chờ của gateway (HTTP-only, không kết nối gateway)
+
+Usage:
+    python worker.py                 # chạy mãi, nhận job từ DATA_DIR/jobs.db
+    python worker.py --id worker-2   # đặt tên worker (mặc định: hostname-pid)
+    python worker.py --once          # thoát khi hàng chờ trống
+
+Chạy nhiều process để chia việc xóa ra nhiều core. Bot (main.py) cần JOB_WORKERS_ENABLED=true.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import discord
+from utils.logger import logger
+from utils.config import config
+from utils import runtime
+from core.http_client import create_http_client, run_http_clear
+from core.job_queue import job_queue
+from core.worker_pool import worker_pool
+
+async def run_job(client: discord.Client, worker_id: str, job: dict) -> None:
+    """Execute one claimed job, sending heartbeats with progress until it finishes"""
+    scope = f"channel:{job['channel_id']}" if job['channel_id'] else f"guild:{job['guild_id']}"
+    logger.info(f"Job #{job['id']} (lần {job['attempts']}): user {job['user_id']}, {job['days']} ngày, {scope}")
+    progress = dict(job['progress'])
+
+    if job['channel_id']:
+        task = asyncio.ensure_future(run_http_clear(client, job['user_id'], job['days'], channel_id=job['channel_id']))
+    else:
+        task = asyncio.ensure_future(run_http_clear(
+            client, job['user_id'], job['days'], guild_id=job['guild_id'], progress=progress
+        ))
+
+    interval = job_queue.lease / 3
+    while not task.done():
+        await asyncio.wait([task], timeout=interval)
+        if not task.done() and not await job_queue.heartbeat(job['id'], worker_id, progress):
+            # Lease đã hết và worker khác nhận job: dừng để không xóa song song
+            logger.warning(f"Job #{job['id']} đã bị worker khác nhận, hủy")
+            task.cancel()
+            return
+
+    try:
+        result = task.result()
+    except Exception as e:
+        # Lỗi của một job không làm dừng worker
+        logger.error(f"Job #{job['id']} lỗi: {e}")
+        result = {'success': False, 'deleted': 0, 'errors': 1, 'error': str(e)}
+
+    await job_queue.heartbeat(job['id'], worker_id, progress)
+    await job_queue.finish(job['id'], worker_id, result)
+    logger.info(f"Job #{job['id']} xong: {result['deleted']} tin nhắn đã xóa, {result['errors']} lỗi")
+
+async def run(worker_id: str, once: bool = False) -> None:
+    """Claim and run jobs until stopped (or until the queue is empty with once)"""
+    client = await create_http_client(config.DISCORD_TOKEN)
+    logger.info(f"Worker {worker_id} đăng nhập HTTP-only: {client.user}")
+    try:
+        if config.HELPER_TOKENS:
+            await worker_pool.start(config.HELPER_TOKENS)
+        while True:
+            job = await job_queue.claim(worker_id)
+            if job is None:
+                if once:
+                    break
+                await asyncio.sleep(config.JOB_QUEUE_POLL_SECONDS)
+                continue
+            await run_job(client, worker_id, job)
+    finally:
+        await worker_pool.close()
+        await client.close()
+        job_queue.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SuperClearChat clear worker")
+    parser.add_argument('--id', default=f"{socket.gethostname()}-{os.getpid()}", help="Tên worker")
+    parser.add_argument('--once', action='store_true', help="Thoát khi hàng chờ trống")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        runtime.run(run(args.id, args.once), config.RUNTIME_PROFILE)
+    except discord.LoginFailure:
+        logger.error("❌ Token Discord không hợp lệ!")
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        logger.info("Đã dừng bởi người dùng")
+        sys.exit(130)